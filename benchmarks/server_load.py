@@ -0,0 +1,114 @@
+# benchmarks/server_load.py
+"""Нагрузка на сервер партий: много партий одновременно, случайные удары.
+
+Сервер и клиенты работают в одном процессе на одном цикле событий,
+клиенты ходят через настоящий TCP-сокет. В конце печатаются метрики
+сервера и расход процессора, пока сервер простаивает.
+
+    python benchmarks/server_load.py --matches 100 --shots 5
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+from server import MatchServer
+
+
+class Client:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.next_id = 0
+        self.waiting: dict[int, asyncio.Future] = {}
+
+    async def read_replies(self):
+        while line := await self.reader.readline():
+            reply = json.loads(line)
+            self.waiting.pop(reply["id"]).set_result(reply)
+
+    async def request(self, **request) -> dict:
+        self.next_id += 1
+        request["id"] = self.next_id
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[self.next_id] = future
+        self.writer.write(json.dumps(request).encode() + b"\n")
+        await self.writer.drain()
+        reply = await future
+        if "error" in reply:
+            raise RuntimeError(reply["error"])
+        return reply
+
+
+async def play(client: Client, shots: int, rng: random.Random) -> int:
+    match = (await client.request(op="new"))["match"]
+    played = 0
+    for _ in range(shots):
+        outcome = await client.request(op="shot", match=match,
+                                       angle=rng.uniform(-math.pi, math.pi),
+                                       force=rng.uniform(600, 2000))
+        played += 1
+        if outcome["state"] != "playing":
+            break
+    await client.request(op="close", match=match)
+    return played
+
+
+async def run(args):
+    server = MatchServer(args.slice_steps)
+    listener = await asyncio.start_server(server.handle_client, "127.0.0.1", 0)
+    port = listener.sockets[0].getsockname()[1]
+    scheduler = asyncio.create_task(server.run_scheduler())
+
+    clients = []
+    for _ in range(args.connections):
+        client = Client(*await asyncio.open_connection("127.0.0.1", port))
+        asyncio.create_task(client.read_replies())
+        clients.append(client)
+
+    rng = random.Random(args.seed)
+    start = time.perf_counter()
+    played = await asyncio.gather(*(
+        play(clients[k % len(clients)], args.shots, random.Random(rng.random()))
+        for k in range(args.matches)))
+    elapsed = time.perf_counter() - start
+
+    stats = server.stats()
+    print(f"{args.matches} партий, {sum(played)} ударов за {elapsed:.2f} с: "
+          f"{sum(played) / elapsed:.1f} ударов/с, {args.matches / elapsed:.2f} партий/с")
+    print(f"задержка удара p50 {stats['latency_p50_ms']:.0f} мс, "
+          f"p99 {stats['latency_p99_ms']:.0f} мс; физика {stats['physics_steps_per_s']:.0f} шагов/с")
+
+    # Простой: планировщик ждёт события и не должен тратить процессор
+    cpu = time.process_time()
+    await asyncio.sleep(args.idle)
+    print(f"процессор за {args.idle:.0f} с простоя: {(time.process_time() - cpu) * 1000:.1f} мс")
+
+    # Клиенты отключаются первыми, чтобы обработчики сервера завершились сами
+    for client in clients:
+        client.writer.close()
+        await client.writer.wait_closed()
+    listener.close()
+    await listener.wait_closed()
+    await asyncio.sleep(0.1)
+    scheduler.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--matches", type=int, default=100)
+    parser.add_argument("--shots", type=int, default=5, help="ударов на партию")
+    parser.add_argument("--connections", type=int, default=4)
+    parser.add_argument("--slice-steps", type=int, default=32)
+    parser.add_argument("--idle", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/shot_cache.py
+"""Кэш исходов ударов на повторяющемся анализе стандартной расстановки.
+
+Один прогон анализа - перебор сетки ударов по разбою из app.init_balls,
+как у инструментов анализа и ShotEvaluator. Прогон повторяется несколько
+раз: без кэша каждый раз считается заново, с кэшем - только первый. Потом
+кэш открывается заново из файла, как после перезапуска.
+
+    python benchmarks/shot_cache.py --runs 10
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+from app import init_balls
+from core.shot_cache import ShotCache
+from core.shot_evaluator import shot_grid
+from core.simulation import ShotSimulator, balls_to_state
+from core.table import Table
+
+
+def analysis_run(simulator: ShotSimulator, state, candidates) -> list:
+    return [simulator.simulate(state, angle, force) for angle, force in candidates]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="повторов анализа")
+    parser.add_argument("--angles", type=int, default=72)
+    parser.add_argument("--forces", type=float, nargs="+", default=[800, 1400, 2000])
+    parser.add_argument("--cache-mb", type=float, default=64)
+    args = parser.parse_args()
+
+    table = Table(width=900, height=450)
+    state = balls_to_state(init_balls(table.width, table.height))
+    candidates = shot_grid(args.angles, args.forces)
+    requested = len(candidates) * args.runs
+
+    start = time.perf_counter()
+    plain = analysis_run(ShotSimulator(table), state, candidates)
+    plain_time = time.perf_counter() - start
+    print(f"без кэша: {len(candidates)} ударов за прогон, {plain_time:.2f} с "
+          f"(x{args.runs} прогонов - около {plain_time * args.runs:.1f} с)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "shots.sqlite")
+        with ShotCache(int(args.cache_mb * (1 << 20)), path) as cache:
+            simulator = ShotSimulator(table, cache=cache)
+            start = time.perf_counter()
+            for _ in range(args.runs):
+                cached = analysis_run(simulator, state, candidates)
+            elapsed = time.perf_counter() - start
+            stats = cache.stats()
+        print(f"с кэшем: {requested} запросов за {elapsed:.2f} с, симуляций "
+              f"{stats['misses']} - в {requested / max(stats['misses'], 1):.0f} раз меньше; "
+              f"попаданий {stats['hit_rate']:.0%}, {stats['bytes'] / 1024:.0f} КБ в памяти")
+        changed = sum(a.pocketed != b.pocketed for a, b in zip(plain, cached))
+        print(f"исход отличается от неокруглённого удара у {changed} из {len(candidates)}")
+
+        # Перезапуск: память пуста, всё берётся из файла
+        with ShotCache(int(args.cache_mb * (1 << 20)), path) as cache:
+            simulator = ShotSimulator(table, cache=cache)
+            start = time.perf_counter()
+            restored = analysis_run(simulator, state, candidates)
+            elapsed = time.perf_counter() - start
+            stats = cache.stats()
+        same = all(a.positions == b.positions and a.pocketed == b.pocketed
+                   for a, b in zip(cached, restored))
+        print(f"после перезапуска: {stats['disk_hits']} из диска, {stats['misses']} симуляций, "
+              f"{elapsed:.2f} с; исходы совпадают: {same}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/stress_throughput.py
+"""Пропускная способность движков (шагов физики в секунду) в зависимости от числа шаров.
+
+Все шары получают случайные скорости, чтобы ни один не уснул и каждое
+тело участвовало в каждом шаге - это худший случай стресс-режима.
+
+    python benchmarks/stress_throughput.py --counts 16 1000 10000
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+from app import init_balls, stress_table_size
+from core.physics import PhysicsEngine
+from core.numpy_physics import NumpyPhysicsEngine
+from core.table import Table
+
+DT = 1 / 240
+
+
+def make_pymunk(spatial_hash):
+    def build(balls):
+        physics = PhysicsEngine()
+        if spatial_hash:
+            physics.use_spatial_hash(balls[0].radius, len(balls))
+        return physics
+    return build
+
+
+def make_numpy(grid):
+    def build(balls):
+        # Без сетки - все пары, как было до широкой фазы
+        return NumpyPhysicsEngine(grid_threshold=64 if grid else len(balls) + 1)
+    return build
+
+
+ENGINES = {
+    "pymunk": make_pymunk(False),
+    "pymunk+hash": make_pymunk(True),
+    "numpy": make_numpy(False),
+    "numpy+grid": make_numpy(True),
+}
+
+# Перебор всех пар растёт как N^2 по памяти: дальше этого числа не запускаем
+ALL_PAIRS_LIMIT = 2000
+
+
+def measure(engine_name, ball_count, steps, seed=0):
+    width, height = stress_table_size(ball_count)
+    table = Table(width=width, height=height)
+    balls = init_balls(width, height, ball_count)
+    physics = ENGINES[engine_name](balls)
+    physics.add_table(table)
+    for ball in balls:
+        physics.add_ball(ball)
+
+    rng = random.Random(seed)
+    for ball in balls:
+        angle = rng.uniform(-math.pi, math.pi)
+        speed = rng.uniform(100, 400)
+        ball.body.velocity = (speed * math.cos(angle), speed * math.sin(angle))
+
+    physics.update(DT)
+    start = time.perf_counter()
+    for _ in range(steps):
+        physics.update(DT)
+    elapsed = time.perf_counter() - start
+    return steps / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+",
+                        default=[16, 100, 1000, 2000, 5000, 10000])
+    parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("--steps", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'шаров':>7} " + " ".join(f"{name:>12}" for name in args.engines))
+    for count in args.counts:
+        row = []
+        for name in args.engines:
+            if name == "numpy" and count > ALL_PAIRS_LIMIT:
+                row.append(f"{'-':>12}")
+                continue
+            row.append(f"{measure(name, count, args.steps):>12.0f}")
+        print(f"{count:>7} " + " ".join(row), flush=True)
+    print(f"шагов/с при dt = 1/{round(1 / DT)} с, все шары в движении")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+# benchmarks/suite.py
+"""Набор замеров: физика, обновление сцены и полный кадр.
+
+Замеряется:
+  - шагов PhysicsEngine.update в секунду на стандартном разбое;
+  - время от разбоя до остановки всех шаров;
+  - стоимость одного вызова GameCanvas.update_balls и MainWindow.update_score_balls;
+  - время кадра MainWindow.update_game с отрисовкой на заданной серии ударов
+    (среднее, 95-й и 99-й перцентили);
+  - холодный старт: процесс с одним core.physics и app.py до первого кадра.
+
+Qt работает без экрана (QT_QPA_PLATFORM=offscreen), время игры подменено
+шагом 1/60 с, поэтому симуляция одинакова от запуска к запуску и меняется
+только затраченное реальное время. Результаты пишутся в JSON вместе со
+сведениями о машине; с --baseline они сравниваются с прошлым запуском.
+
+    python benchmarks/suite.py --output bench.json
+    python benchmarks/suite.py --baseline bench.json --output new.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, "src"))
+from app import PHYSICS_HZ, DISPLAY_HZ, init_balls
+from core.physics import PhysicsEngine
+from core.shot_log import ShotLog, ShotReplayer
+from core.table import Table
+
+TABLE_SIZE = (900, 450)
+# Разбой: биток прямо в вершину пирамиды с наибольшей силой кия
+BREAK_SHOT = (0.0, 2000)
+# Серия для замера кадров: разбой и удары с заранее заданными углом и силой
+SHOT_SEQUENCE = [BREAK_SHOT, (2.6, 1500), (-0.9, 1200), (1.8, 1800), (-2.4, 1000), (0.4, 1600)]
+# Разбой слишком короткий для одного замера: в каждом повторе их столько
+BREAKS_PER_SAMPLE = 20
+# Ограничение на один удар, если шары почему-то не останавливаются
+MAX_FRAMES_PER_SHOT = 60 * 60
+
+
+class Metric:
+    def __init__(self, value: float, unit: str, better: str, samples: list[float] = None):
+        self.value = value
+        self.unit = unit
+        # "lower" - меньше лучше (время), "higher" - больше лучше (пропускная способность)
+        self.better = better
+        self.samples = samples or [value]
+
+    def to_dict(self):
+        return {"value": self.value, "unit": self.unit, "better": self.better,
+                "samples": self.samples}
+
+
+def median_metric(samples: list[float], unit: str, better: str) -> Metric:
+    return Metric(statistics.median(samples), unit, better, samples)
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def break_log() -> ShotLog:
+    width, height = TABLE_SIZE
+    table = Table(width=width, height=height)
+    log = ShotLog.from_balls(table, init_balls(width, height), PHYSICS_HZ)
+    cue_position = log.rack[0][2]
+    log.record(cue_position, *BREAK_SHOT, 0)
+    return log
+
+
+def bench_physics(repeat: int) -> dict[str, Metric]:
+    # Тот же движок, шары и лузы, что в игре, но без Qt
+    log = break_log()
+    steps_per_s, wall_times = [], []
+    steps = 0
+    for _ in range(repeat):
+        replayers = [ShotReplayer(log) for _ in range(BREAKS_PER_SAMPLE)]
+        start = time.perf_counter()
+        for replayer in replayers:
+            steps = replayer.play_shot().steps
+        elapsed = time.perf_counter() - start
+        steps_per_s.append(steps * BREAKS_PER_SAMPLE / elapsed)
+        wall_times.append(elapsed / BREAKS_PER_SAMPLE)
+    return {
+        "physics_break_steps_per_s": median_metric(steps_per_s, "steps/s", "higher"),
+        "break_to_rest_wall_s": median_metric(wall_times, "s", "lower"),
+        # Не зависит от машины: изменение значит, что поменялась сама физика
+        "break_to_rest_sim_s": Metric(steps / PHYSICS_HZ, "s", "lower"),
+    }
+
+
+def build_game():
+    from PyQt6.QtWidgets import QApplication
+    from ui.game_canvas import GameCanvas
+    from ui.main_window import MainWindow
+
+    qt_app = QApplication.instance() or QApplication(sys.argv)
+    width, height = TABLE_SIZE
+    physics = PhysicsEngine()
+    table = Table(width=width, height=height)
+    physics.add_table(table)
+    balls = init_balls(width, height)
+    for ball in balls:
+        physics.add_ball(ball)
+    canvas = GameCanvas(physics, table, balls, physics_hz=PHYSICS_HZ)
+    window = MainWindow(canvas, physics_hz=PHYSICS_HZ, display_hz=DISPLAY_HZ)
+    window.resize(1280, 800)
+    window.show()
+    qt_app.processEvents()
+
+    # Кадры вызываются из замера, а не таймером; окно конца партии не показываем
+    window.timer.timeout.disconnect()
+    canvas.game_over_signal.disconnect()
+    game_time = [0.0]
+
+    def time_source():
+        game_time[0] += 1 / DISPLAY_HZ
+        return game_time[0]
+    window.clock.time_source = time_source
+    window.clock.reset()
+    return qt_app, canvas, window
+
+
+def bench_scene(repeat: int) -> dict[str, Metric]:
+    qt_app, canvas, window = build_game()
+    dt = 1 / PHYSICS_HZ
+    steps_per_frame = PHYSICS_HZ // DISPLAY_HZ
+
+    update_balls, idle_score, changed_score = [], [], []
+    for _ in range(repeat):
+        canvas.reset_game()
+        canvas.strike_cue_ball(*BREAK_SHOT)
+        calls = []
+        while not canvas.resting:
+            canvas.step_physics(dt, steps_per_frame)
+            start = time.perf_counter()
+            canvas.update_balls()
+            calls.append(time.perf_counter() - start)
+        update_balls.append(statistics.mean(calls) * 1e6)
+
+        # Панель без изменений - самый частый случай, и раскладка значков заново
+        window.update_score_balls()
+        start = time.perf_counter()
+        for _ in range(10000):
+            window.update_score_balls()
+        idle_score.append((time.perf_counter() - start) * 1e2)
+
+        calls = []
+        for k in range(50):
+            canvas.potted_balls_order = [1, 9, 2] if k % 2 else [10]
+            start = time.perf_counter()
+            window.update_score_balls()
+            calls.append(time.perf_counter() - start)
+        changed_score.append(statistics.mean(calls) * 1e6)
+    canvas.reset_game()
+    window.update_score_balls()
+    qt_app.processEvents()
+
+    return {
+        "update_balls_during_break_us": median_metric(update_balls, "us/call", "lower"),
+        "update_score_balls_idle_us": median_metric(idle_score, "us/call", "lower"),
+        "update_score_balls_changed_us": median_metric(changed_score, "us/call", "lower"),
+    }
+
+
+def bench_frames(repeat: int) -> dict[str, Metric]:
+    qt_app, canvas, window = build_game()
+    viewport = canvas.viewport()
+    runs = []
+    for _ in range(repeat):
+        canvas.reset_game()
+        frames = []
+        for angle, force in SHOT_SEQUENCE:
+            if canvas.cue_ball.in_pocket or canvas.game_rules.game_state != "playing":
+                break
+            canvas.strike_cue_ball(angle, force)
+            window.clock.reset()
+            for _ in range(MAX_FRAMES_PER_SHOT):
+                start = time.perf_counter()
+                window.update_game()
+                # Отрисовка сразу, а не когда до неё дойдёт цикл событий
+                viewport.repaint()
+                qt_app.processEvents()
+                frames.append(time.perf_counter() - start)
+                if canvas.resting:
+                    break
+        runs.append([frame * 1e3 for frame in frames])
+
+    means = [statistics.mean(frames) for frames in runs]
+    p95 = [percentile(frames, 0.95) for frames in runs]
+    p99 = [percentile(frames, 0.99) for frames in runs]
+    return {
+        "frame_mean_ms": median_metric(means, "ms", "lower"),
+        "frame_p95_ms": median_metric(p95, "ms", "lower"),
+        "frame_p99_ms": median_metric(p99, "ms", "lower"),
+        "frames_per_sequence": Metric(len(runs[0]), "frames", "lower"),
+    }
+
+
+def run_python(*args) -> tuple[float, str]:
+    # Отдельный процесс: модули не закэшированы в sys.modules этого
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, *args], cwd=os.path.join(ROOT, "src"), env=env,
+                            capture_output=True, text=True, check=True)
+    return time.perf_counter() - start, result.stdout
+
+
+def bench_startup(repeat: int) -> dict[str, Metric]:
+    core_only, first_frame, app_process = [], [], []
+    for _ in range(repeat):
+        elapsed, _ = run_python("-c", "import core.physics")
+        core_only.append(elapsed * 1e3)
+        elapsed, output = run_python("app.py", "--startup-time")
+        app_process.append(elapsed * 1e3)
+        first_frame.append(float(output.split()[3]))
+    return {
+        "startup_core_physics_process_ms": median_metric(core_only, "ms", "lower"),
+        "startup_first_frame_ms": median_metric(first_frame, "ms", "lower"),
+        "startup_app_process_ms": median_metric(app_process, "ms", "lower"),
+    }
+
+
+BENCHMARKS = {
+    "physics": bench_physics,
+    "scene": bench_scene,
+    "frames": bench_frames,
+    "startup": bench_startup,
+}
+
+
+def package_version(name: str) -> str:
+    try:
+        from importlib.metadata import version
+        return version(name)
+    except Exception:
+        return None
+
+
+def machine_info() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "pymunk": package_version("pymunk"),
+        "pyqt6": package_version("PyQt6"),
+        "numpy": package_version("numpy"),
+        "qt_platform": os.environ.get("QT_QPA_PLATFORM"),
+        "commit": commit,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[str]:
+    """Печатает сравнение с базовым запуском и возвращает ухудшившиеся замеры"""
+    regressions = []
+    print(f"\n{'замер':<34} {'база':>12} {'сейчас':>12} {'изм.':>8}")
+    for name, metric in results.items():
+        old = baseline.get(name)
+        if old is None or not old["value"]:
+            continue
+        change = (metric["value"] - old["value"]) / old["value"]
+        worse = change > threshold if metric["better"] == "lower" else change < -threshold
+        mark = "  хуже" if worse else ""
+        print(f"{name:<34} {old['value']:>12.4g} {metric['value']:>12.4g} {change:>+8.1%}{mark}")
+        if worse:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="число повторов; в результат идёт медиана")
+    parser.add_argument("--output", help="куда записать результаты в JSON")
+    parser.add_argument("--baseline", help="JSON прошлого запуска для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="допустимое ухудшение относительно базы (доля)")
+    args = parser.parse_args()
+
+    results = {}
+    for name in args.only:
+        start = time.perf_counter()
+        metrics = BENCHMARKS[name](args.repeat)
+        for metric_name, metric in metrics.items():
+            print(f"{metric_name:<34} {metric.value:>12.4g} {metric.unit}", flush=True)
+            results[metric_name] = metric.to_dict()
+        print(f"  ({name}: {time.perf_counter() - start:.1f} с)", flush=True)
+
+    report = {
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "machine": machine_info(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("machine", {}).get("platform") != report["machine"]["platform"]:
+            print("\nвнимание: база снята на другой машине")
+        regressions = compare(results, baseline["results"], args.threshold)
+        if regressions:
+            print(f"\nухудшились: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
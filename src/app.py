@@ -1,17 +1,56 @@
 # src/app.py
+import time
+STARTED = time.perf_counter()
 import sys
 import math
-import os
-import copy
-from PyQt6.QtWidgets import QApplication
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
 from core.physics import PhysicsEngine
 from core.ball import Ball
 from core.table import Table
-from ui.game_canvas import GameCanvas
-from ui.main_window import MainWindow
+# Qt и модули ui загружаются только в main(): init_balls, stress_table_size
+# и константы нужны и скриптам без окна
+
+# Частота шагов физики и частота перерисовки задаются независимо
+PHYSICS_HZ = 240
+DISPLAY_HZ = 60
+
+# Стресс-режим: до 10000 прицельных шаров на увеличенном столе
+MAX_BALLS = 10000
+# Сколько шаров нормально обходится деревом AABB pymunk по умолчанию
+SPATIAL_HASH_THRESHOLD = 100
+
+def stress_table_size(ball_count, ball_radius=15):
+    # Решётка шаров с зазором занимает правые две трети стола
+    spacing = ball_radius * 2.2
+    rows = math.ceil(math.sqrt(ball_count / 2))
+    cols = math.ceil(ball_count / rows)
+    margin = 60 + ball_radius
+    width = max(900, cols * spacing * 1.5 + 2 * margin)
+    height = max(450, rows * spacing + 2 * margin)
+    return width, height
+
+def init_grid_balls(table_width, table_height, ball_count, ball_radius=15):
+    # Прицельные шары решёткой у правого борта; восьмёрка одна - в центре,
+    # остальные номера идут по кругу, чтобы не закончить партию сразу
+    spacing = ball_radius * 2.2
+    rows = math.ceil(math.sqrt(ball_count / 2))
+    cols = math.ceil(ball_count / rows)
+    start_x = table_width - 60 - ball_radius - (cols - 1) * spacing
+    start_y = table_height/2 - (rows - 1) * spacing / 2
+    numbers = [n for n in range(1, 16) if n != 8]
+
+    balls = [Ball(0, ball_radius, (start_x / 2, table_height/2))]
+    for i in range(ball_count):
+        col, row = divmod(i, rows)
+        ball_num = 8 if i == ball_count // 2 else numbers[i % len(numbers)]
+        balls.append(Ball(ball_num, ball_radius,
+                          (start_x + col * spacing, start_y + row * spacing)))
+    return balls
+
+def init_balls(table_width, table_height, ball_count=15):
+    if ball_count != 15:
+        return init_grid_balls(table_width, table_height, ball_count)
 
-def init_balls(table_width, table_height):
     balls = []
     ball_radius = 15
     balls.append(Ball(0, ball_radius, (300, table_height/2)))
@@ -34,25 +73,69 @@ def init_balls(table_width, table_height):
             y = start_y + (col - row/2) * spacing
             balls.append(Ball(ball_num, ball_radius, (x, y)))
     
-    return copy.deepcopy(balls)
+    return balls
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Бильярд")
+    parser.add_argument("--balls", type=int, default=15,
+                        help=f"число прицельных шаров, до {MAX_BALLS} (стресс-режим)")
+    parser.add_argument("--table", default=None, metavar="ШxВ",
+                        help="размер стола, например 1800x900; по умолчанию под число шаров")
+    parser.add_argument("--startup-time", action="store_true",
+                        help="вывести время до первого кадра и выйти")
+    # Аргументы Qt (-platform и т.п.) оставляем QApplication
+    args, _ = parser.parse_known_args(argv[1:])
+    if not 1 <= args.balls <= MAX_BALLS:
+        parser.error(f"--balls должно быть от 1 до {MAX_BALLS}")
+    min_width, min_height = stress_table_size(args.balls)
+    if args.table:
+        try:
+            width, height = (float(v) for v in args.table.lower().split("x"))
+        except ValueError:
+            parser.error(f"--table ожидает ШИРИНАxВЫСОТА, например 1800x900, а не {args.table!r}")
+        # Меньший стол не вмещает расстановку: шары оказались бы за бортами
+        if not (math.isfinite(width) and math.isfinite(height)) or \
+                width < min_width or height < min_height:
+            parser.error(f"для {args.balls} шаров стол должен быть не меньше "
+                         f"{min_width:.0f}x{min_height:.0f}")
+    else:
+        width, height = min_width, min_height
+    args.width, args.height = width, height
+    return args
 
 def main():
+    args = parse_args(sys.argv)
+    from PyQt6.QtCore import QTimer
+    from PyQt6.QtWidgets import QApplication
+    from ui.game_canvas import GameCanvas
+    from ui.main_window import MainWindow
     app = QApplication(sys.argv)
     
     # Инициализация игровых компонентов
     physics = PhysicsEngine()
-    table = Table(width=900, height=450)
+    table = Table(width=args.width, height=args.height)
     physics.add_table(table)
     
-    balls = init_balls(table.width, table.height)
+    balls = init_balls(table.width, table.height, args.balls)
+    if len(balls) > SPATIAL_HASH_THRESHOLD:
+        physics.use_spatial_hash(balls[0].radius, len(balls))
     for ball in balls:
         physics.add_ball(ball)
     
     # Создание UI
-    game_canvas = GameCanvas(physics, table, balls)
+    game_canvas = GameCanvas(physics, table, balls, physics_hz=PHYSICS_HZ)
 
-    window = MainWindow(game_canvas)
+    window = MainWindow(game_canvas, physics_hz=PHYSICS_HZ, display_hz=DISPLAY_HZ)
     window.showMaximized()
+
+    if args.startup_time:
+        # Нулевой таймер срабатывает, когда цикл событий разобрал показ окна
+        # и первую отрисовку
+        def report_first_frame():
+            print(f"первый кадр через {(time.perf_counter() - STARTED) * 1000:.0f} мс "
+                  f"после запуска app.py")
+            app.quit()
+        QTimer.singleShot(0, report_first_frame)
     
     sys.exit(app.exec())
 
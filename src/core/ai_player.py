@@ -0,0 +1,153 @@
+# src/core/ai_player.py
+import math
+import time
+import pymunk as pm
+from .table import Table
+from .game_rules import GameRules
+from .simulation import ShotSimulator, ShotOutcome
+
+SOLIDS = range(1, 8)
+STRIPES = range(9, 16)
+
+
+class CandidateShot:
+    def __init__(self, target: int, pocket: tuple[float, float],
+                 angle: float, force: float, difficulty: float):
+        self.target = target
+        self.pocket = pocket
+        self.angle = angle
+        self.force = force
+        # Чем меньше, тем проще удар: учитывает срез и длину обоих отрезков
+        self.difficulty = difficulty
+
+    def __repr__(self):
+        return (f"CandidateShot(target={self.target}, pocket={self.pocket}, "
+                f"angle={self.angle:.3f}, force={self.force:.0f})")
+
+
+class AIPlayer:
+    """Компьютерный соперник для восьмёрки.
+
+    Для каждой пары (свой шар, луза) строится точка прицеливания
+    "призрачного шара", перекрытые линии отбрасываются запросами
+    segment_query к пространству pymunk, и только оставшиеся удары
+    прогоняются через ShotSimulator - пока не кончится бюджет времени.
+    """
+
+    def __init__(self, table: Table = None, time_budget: float = 0.1,
+                 ball_radius: float = 15.0, max_cut_angle: float = math.radians(75),
+                 cache=None):
+        self.simulator = ShotSimulator(table, ball_radius=ball_radius, cache=cache)
+        self.table = self.simulator.table
+        self.time_budget = time_budget
+        self.ball_radius = ball_radius
+        self.min_cut_cos = math.cos(max_cut_angle)
+        self.min_force = 300
+        self.max_force = 2000
+
+    def target_numbers(self, state: dict[int, tuple[float, float]],
+                       rules: GameRules, player: int) -> list[int]:
+        group = rules.player1_type if player == 1 else rules.player2_type
+        if group == "solid":
+            targets = [n for n in state if n in SOLIDS]
+        elif group == "striped":
+            targets = [n for n in state if n in STRIPES]
+        else:
+            # Группы ещё не распределены - подходит любой цветной шар
+            targets = [n for n in state if n in SOLIDS or n in STRIPES]
+        if not targets and 8 in state:
+            targets = [8]
+        return targets
+
+    def _is_blocked(self, start, end, ignore: set[int]) -> bool:
+        hits = self.simulator.physics.space.segment_query(
+            start, end, self.ball_radius, pm.ShapeFilter())
+        for hit in hits:
+            ball = self.simulator.physics.ball_for_shape(hit.shape)
+            if ball is not None and ball.number not in ignore:
+                return True
+        return False
+
+    def candidate_shots(self, state: dict[int, tuple[float, float]],
+                        targets: list[int]) -> list[CandidateShot]:
+        """Геометрический отбор ударов; физика здесь не запускается"""
+        self.simulator.load_state(state)
+        cue = state.get(0)
+        if cue is None:
+            return []
+
+        candidates = []
+        for target in targets:
+            tx, ty = state[target]
+            for pocket in self.table.pockets:
+                to_pocket_x, to_pocket_y = pocket[0] - tx, pocket[1] - ty
+                pocket_dist = math.hypot(to_pocket_x, to_pocket_y)
+                if pocket_dist == 0:
+                    continue
+                ux, uy = to_pocket_x / pocket_dist, to_pocket_y / pocket_dist
+                ghost = (tx - ux * 2 * self.ball_radius, ty - uy * 2 * self.ball_radius)
+
+                aim_x, aim_y = ghost[0] - cue[0], ghost[1] - cue[1]
+                aim_dist = math.hypot(aim_x, aim_y)
+                if aim_dist == 0:
+                    continue
+                cut_cos = (aim_x * ux + aim_y * uy) / aim_dist
+                if cut_cos < self.min_cut_cos:
+                    continue
+
+                if self._is_blocked(cue, ghost, {0, target}):
+                    continue
+                if self._is_blocked((tx, ty), pocket, {target}):
+                    continue
+
+                # Силы хватает, чтобы оба шара прошли свой путь с запасом
+                force = min(max((aim_dist + pocket_dist / cut_cos) * 2.5, self.min_force),
+                            self.max_force)
+                difficulty = (aim_dist + pocket_dist) / cut_cos
+                candidates.append(CandidateShot(target, pocket, math.atan2(aim_y, aim_x),
+                                                force, difficulty))
+        candidates.sort(key=lambda shot: shot.difficulty)
+        return candidates
+
+    def score_outcome(self, outcome: ShotOutcome, targets: list[int]) -> float:
+        score = 0.0
+        for number in outcome.pocketed:
+            if number == 0:
+                score -= 100
+            elif number == 8:
+                score += 1000 if targets == [8] else -1000
+            elif number in targets:
+                score += 10
+            else:
+                score -= 5
+        return score
+
+    def choose_shot(self, state: dict[int, tuple[float, float]],
+                    rules: GameRules, player: int) -> tuple[float, float]:
+        """Возвращает (угол, сила) удара, уложившись в time_budget секунд"""
+        deadline = time.perf_counter() + self.time_budget
+        targets = self.target_numbers(state, rules, player)
+        candidates = self.candidate_shots(state, targets)
+        if not candidates:
+            return self.fallback_shot(state, targets)
+
+        best_shot, best_score = candidates[0], -math.inf
+        for shot in candidates:
+            if time.perf_counter() >= deadline:
+                break
+            outcome = self.simulator.simulate(state, shot.angle, shot.force)
+            # Небольшой штраф за сложность различает удары с одинаковым исходом
+            score = self.score_outcome(outcome, targets) - shot.difficulty * 1e-3
+            if score > best_score:
+                best_shot, best_score = shot, score
+        return best_shot.angle, best_shot.force
+
+    def fallback_shot(self, state: dict[int, tuple[float, float]],
+                      targets: list[int]) -> tuple[float, float]:
+        """Если чистых ударов нет - бьём в ближайший свой шар средней силой"""
+        cue = state.get(0)
+        if cue is None or not targets:
+            return 0.0, self.min_force
+        nearest = min(targets, key=lambda n: math.dist(cue, state[n]))
+        tx, ty = state[nearest]
+        return math.atan2(ty - cue[1], tx - cue[0]), (self.min_force + self.max_force) / 2
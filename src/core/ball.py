@@ -11,11 +11,13 @@ class Ball:
         self.number = number
         self.radius = radius
         self.position = position
+        # Позиция на предыдущем шаге физики - для интерполяции при отрисовке
+        self.previous_position = position
         self.color = color if color is not None else self._get_ball_color(number)
         self.velocity = velocity
         self.body = None
+        self.shape = None
         self.in_pocket = False
-        self.in_pocket = False 
 
     def  _get_ball_color(self, number: int) -> tuple[int, int, int]:
         #шарики 1-7 сплошные, а 9-15 с полоской, 8 шарик чёрный для битья
@@ -49,6 +51,7 @@ class Ball:
         shape.friction = 0.4
         space.add(body, shape)
         self.body = body
+        self.shape = shape
         return body
     
     def update_position(self):
@@ -56,7 +59,19 @@ class Ball:
             self.position = (self.body.position.x, self.body.position.y)
             self.velocity = (self.body.velocity.x, self.body.velocity.y)
 
+    def save_previous_position(self):
+        if self.body is not None:
+            self.previous_position = (self.body.position.x, self.body.position.y)
+
+    def interpolated_position(self, alpha: float) -> tuple[float, float]:
+        px, py = self.previous_position
+        x, y = self.position
+        return (px + (x - px) * alpha, py + (y - py) * alpha)
+
     def is_moving(self) -> bool:
         if self.body is None:
             return False
+        # Уснувшее тело pymunk стоит, даже если у него осталась малая скорость
+        if self.body.is_sleeping:
+            return False
         return self.body.velocity.length > 0.1
\ No newline at end of file
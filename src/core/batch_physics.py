@@ -0,0 +1,127 @@
+# src/core/batch_physics.py
+import numpy as np
+from .ball import Ball
+from .table import Table
+from .numpy_physics import (integrate, resolve_ball_collisions, resolve_cushions,
+                            capture_pockets, cushion_bounds, pocket_free_zone)
+
+
+class BatchResult:
+    def __init__(self, numbers, positions, pocketed, pocket_step, steps):
+        # Номера шаров по столбцам: positions[k, i] относится к шару numbers[i]
+        self.numbers = numbers
+        # (N, B, 2) итоговые позиции (у забитых шаров - место поимки)
+        self.positions = positions
+        # (N, B) True, если шар забит
+        self.pocketed = pocketed
+        # (N, B) шаг, на котором шар упал в лузу, или -1
+        self.pocket_step = pocket_step
+        # (N,) число шагов до остановки каждого стола
+        self.steps = steps
+
+    def pocketed_order(self, table_index: int) -> list[int]:
+        """Номера забитых шаров на столе table_index в порядке попадания"""
+        row = self.pocket_step[table_index]
+        columns = np.flatnonzero(row >= 0)
+        columns = columns[np.argsort(row[columns], kind="stable")]
+        return [int(self.numbers[i]) for i in columns]
+
+
+class BatchPhysicsEngine:
+    """N независимых столов по B шаров, которые шагают одним вызовом.
+
+    Состояние хранится тензорами (N, B, 2); геометрия стола, лузы и
+    радиусы шаров общие для всей пачки и не копируются N раз. Стол
+    выбывает из расчёта, как только все его шары остановились, поэтому
+    каждая партия заканчивается в свой момент.
+    """
+
+    def __init__(self, table: Table, balls: list[Ball], count: int):
+        self.table = table
+        self.damping = 0.3
+        self.pocket_radius = 18
+        self.rest_speed = 0.1
+
+        on_table = [ball for ball in balls if not ball.in_pocket]
+        self.numbers = np.array([ball.number for ball in on_table])
+        self.radii = np.array([ball.radius for ball in on_table], dtype=float)
+        self.pockets = np.array(table.pockets, dtype=float)
+        self.low, self.high = cushion_bounds(self.radii, table.width, table.height)
+        self.pocket_zone = pocket_free_zone(self.pockets, self.radii, self.pocket_radius,
+                                            table.width, table.height)
+
+        rack = np.array([ball.position for ball in on_table], dtype=float)
+        self.positions = np.repeat(rack[None], count, axis=0)
+        self.velocities = np.zeros_like(self.positions)
+        self.active = np.ones(self.positions.shape[:2], dtype=bool)
+        self.pocket_step = np.full(self.positions.shape[:2], -1)
+        self.steps = np.zeros(count, dtype=int)
+        self.done = np.ones(count, dtype=bool)
+
+    @property
+    def count(self) -> int:
+        return self.positions.shape[0]
+
+    def strike(self, angles, forces, tables=None):
+        """Удар битком на каждом столе: angles и forces - массивы длины N.
+
+        tables - индексы столов, по которым бить (тогда angles и forces той
+        же длины); остальные столы стоят.
+        """
+        cue = np.flatnonzero(self.numbers == 0)
+        if cue.size == 0:
+            return
+        if tables is None:
+            tables = slice(None)
+        angles = np.asarray(angles, dtype=float)
+        forces = np.asarray(forces, dtype=float)
+        self.velocities[tables, cue[0], 0] = forces * np.cos(angles)
+        self.velocities[tables, cue[0], 1] = forces * np.sin(angles)
+        self.done[tables] = False
+
+    def update(self, dt: float):
+        running = np.flatnonzero(~self.done)
+        if running.size == 0:
+            return
+        # Считаем только ещё катящиеся столы: остановившиеся не стоят ничего
+        positions = self.positions[running]
+        velocities = self.velocities[running]
+        active = self.active[running]
+
+        integrate(positions, velocities, active, self.damping, dt)
+        resolve_ball_collisions(positions, velocities, active, self.radii, dt)
+        captured = capture_pockets(positions, velocities, active, self.radii,
+                                   self.pockets, self.pocket_radius, self.pocket_zone)
+        resolve_cushions(positions, velocities, self.low, self.high)
+
+        steps = self.steps[running] + 1
+        pocket_step = self.pocket_step[running]
+        pocket_step[captured] = np.broadcast_to(steps[:, None], captured.shape)[captured]
+
+        speed_sq = (velocities * velocities).sum(axis=2)
+        stopped = speed_sq.max(axis=1) <= self.rest_speed * self.rest_speed
+        # Как и ShotSimulator, дотормаживаем остановившиеся столы до нуля
+        velocities[stopped] = 0
+
+        self.positions[running] = positions
+        self.velocities[running] = velocities
+        self.active[running] = active
+        self.pocket_step[running] = pocket_step
+        self.steps[running] = steps
+        self.done[running] = stopped
+
+    def run(self, dt: float = 1/60.0, max_steps: int = 20000) -> BatchResult:
+        for _ in range(max_steps):
+            if self.done.all():
+                break
+            self.update(dt)
+        return BatchResult(self.numbers, self.positions.copy(), ~self.active,
+                           self.pocket_step.copy(), self.steps.copy())
+
+
+def simulate_batch(table: Table, balls: list[Ball], angles, forces,
+                   dt: float = 1/60.0, max_steps: int = 20000) -> BatchResult:
+    """Один и тот же расклад под N разными ударами, все столы разом"""
+    engine = BatchPhysicsEngine(table, balls, len(angles))
+    engine.strike(angles, forces)
+    return engine.run(dt, max_steps)
@@ -0,0 +1,348 @@
+# src/core/event_physics.py
+import math
+import numpy as np
+import pymunk as pm
+from .ball import Ball
+from .table import Table
+from .numpy_physics import BALL_ELASTICITY, CUSHION_ELASTICITY, BORDER_THICKNESS
+
+# Число делений пополам при уточнении корня - до точности double
+ROOT_BISECTIONS = 64
+
+
+class EventBody:
+    """Заменитель pm.Body для EventPhysicsEngine (как ArrayBody для NumPy-движка)"""
+
+    def __init__(self, engine: "EventPhysicsEngine", index: int):
+        self.engine = engine
+        self.index = index
+
+    @property
+    def position(self) -> pm.Vec2d:
+        return pm.Vec2d(*self.engine.state_at(self.index, self.engine.time)[0])
+
+    @position.setter
+    def position(self, value):
+        self.engine.set_state(self.index, position=value)
+
+    @property
+    def velocity(self) -> pm.Vec2d:
+        return pm.Vec2d(*self.engine.state_at(self.index, self.engine.time)[1])
+
+    @velocity.setter
+    def velocity(self, value):
+        self.engine.set_state(self.index, velocity=value)
+
+    @property
+    def is_sleeping(self) -> bool:
+        return False
+
+
+def _polyval(coeffs: list[float], t: float) -> float:
+    result = 0.0
+    for c in coeffs:
+        result = result * t + c
+    return result
+
+
+def _first_entry_time(coeffs: list[float], horizon: float):
+    """Первый момент на [0, horizon], когда многочлен f становится <= 0.
+
+    coeffs - от старшей степени к младшей, f(0) - квадрат зазора минус
+    квадрат дистанции контакта. Корни np.roots служат только точками
+    разбиения отрезка: сам момент находится делением пополам по знаку f,
+    поэтому неточные и почти кратные корни не приводят к пропуску касания.
+    """
+    if coeffs[-1] <= 0:
+        # Уже в контакте: событие сейчас, если тела сближаются
+        return 0.0 if coeffs[-2] < 0 else None
+
+    points = {horizon}
+    for root in np.roots(coeffs):
+        t = float(root.real)
+        if 0 < t < horizon:
+            points.add(t)
+
+    last_positive = 0.0
+    for point in sorted(points):
+        # Середина ловит касательные заходы между двумя близкими корнями
+        for t in ((last_positive + point) / 2, point):
+            if _polyval(coeffs, t) > 0:
+                last_positive = t
+                continue
+            low, high = last_positive, t
+            for _ in range(ROOT_BISECTIONS):
+                middle = (low + high) / 2
+                if middle <= low or middle >= high:
+                    break
+                if _polyval(coeffs, middle) > 0:
+                    low = middle
+                else:
+                    high = middle
+            return high
+    return None
+
+
+class EventPhysicsEngine:
+    """Аналитический событийный движок: шары катятся с постоянным замедлением.
+
+    Между событиями траектория шара - парабола, заданная опорным состоянием
+    (позиция, скорость, момент). Моменты столкновений шар-шар и шар-луза
+    (многочлен 4-й степени) и шар-борт (квадратное уравнение) вычисляются
+    точно, и движок прыгает от события к событию без промежуточных шагов.
+    Опорное состояние меняется только у шаров, участвующих в событии, а
+    update() лишь сдвигает текущее время - поэтому результат не зависит от
+    частоты кадров и повторяется бит в бит. Туннелирования нет при любой
+    скорости.
+
+    Интерфейс как у PhysicsEngine: add_ball, add_table, update, is_ball_moving.
+    """
+
+    def __init__(self, deceleration: float = 600.0):
+        # Замедление от трения качения, пикс/с^2
+        self.deceleration = deceleration
+        self.ball_elasticity = BALL_ELASTICITY
+        self.cushion_elasticity = CUSHION_ELASTICITY
+        self.border_thickness = BORDER_THICKNESS
+        self.pocket_radius = 18
+        self.max_events = 100000
+
+        self.time = 0.0
+        self.balls: list[Ball] = []
+        self.ref_positions: list[tuple[float, float]] = []
+        self.ref_velocities: list[tuple[float, float]] = []
+        self.ref_times: list[float] = []
+        self.stop_times: list[float] = []
+        self.active: list[bool] = []
+        self.table = None
+
+        # Ближайшие события: для пар шаров и для каждого шара отдельно
+        # (борт, луза или остановка). Значение - (время, вид, данные)
+        self.pair_events: dict[tuple[int, int], tuple] = {}
+        self.ball_events: dict[int, tuple] = {}
+        self.pocketed: list[int] = []
+        self.event_count = 0
+
+    def add_ball(self, ball: Ball):
+        index = len(self.balls)
+        self.balls.append(ball)
+        self.ref_positions.append((0.0, 0.0))
+        self.ref_velocities.append((0.0, 0.0))
+        self.ref_times.append(self.time)
+        self.stop_times.append(self.time)
+        self.active.append(not ball.in_pocket)
+        self._set_trajectory(index, ball.position, ball.velocity)
+        ball.body = EventBody(self, index)
+        self._reschedule({index})
+
+    def add_table(self, table: Table):
+        self.table = table
+        self._reschedule(set(range(len(self.balls))))
+
+    def set_state(self, index: int, position=None, velocity=None):
+        current_position, current_velocity = self.state_at(index, self.time)
+        self._set_trajectory(index,
+                             current_position if position is None else position,
+                             current_velocity if velocity is None else velocity)
+        self._reschedule({index})
+
+    def is_ball_moving(self, ball_body: EventBody) -> bool:
+        index = ball_body.index
+        return self.active[index] and self.time < self.stop_times[index]
+
+    # --- Кинематика ---
+
+    def _set_trajectory(self, index: int, position, velocity):
+        vx, vy = float(velocity[0]), float(velocity[1])
+        self.ref_positions[index] = (float(position[0]), float(position[1]))
+        self.ref_velocities[index] = (vx, vy)
+        self.ref_times[index] = self.time
+        self.stop_times[index] = self.time + math.hypot(vx, vy) / self.deceleration
+
+    def _acceleration(self, index: int) -> tuple[float, float]:
+        vx, vy = self.ref_velocities[index]
+        speed = math.hypot(vx, vy)
+        if speed == 0:
+            return 0.0, 0.0
+        return -self.deceleration * vx / speed, -self.deceleration * vy / speed
+
+    def state_at(self, index: int, t: float):
+        """Позиция и скорость шара в момент t по его опорному состоянию"""
+        (px, py), (vx, vy) = self.ref_positions[index], self.ref_velocities[index]
+        if (vx == 0 and vy == 0) or not self.active[index]:
+            return (px, py), (0.0, 0.0)
+        ax, ay = self._acceleration(index)
+        tau = min(t, self.stop_times[index]) - self.ref_times[index]
+        position = (px + vx * tau + 0.5 * ax * tau * tau,
+                    py + vy * tau + 0.5 * ay * tau * tau)
+        if t >= self.stop_times[index]:
+            return position, (0.0, 0.0)
+        return position, (vx + ax * tau, vy + ay * tau)
+
+    # --- Предсказание событий ---
+
+    def _predict_pair(self, i: int, j: int):
+        moving = [k for k in (i, j) if self.time < self.stop_times[k]]
+        if not moving:
+            return None
+        (pix, piy), (vix, viy) = self.state_at(i, self.time)
+        (pjx, pjy), (vjx, vjy) = self.state_at(j, self.time)
+        reach = self.balls[i].radius + self.balls[j].radius
+        dx, dy = pix - pjx, piy - pjy
+        # Быстрый отсев: шары не успеют сблизиться, даже двигаясь навстречу
+        travel = sum((self.stop_times[k] - self.time) ** 2 * self.deceleration / 2
+                     for k in moving)
+        if math.hypot(dx, dy) - reach > travel:
+            return None
+
+        horizon = min(self.stop_times[k] for k in moving) - self.time
+        aix, aiy = self._acceleration(i) if i in moving else (0.0, 0.0)
+        ajx, ajy = self._acceleration(j) if j in moving else (0.0, 0.0)
+        hx, hy = 0.5 * (aix - ajx), 0.5 * (aiy - ajy)
+        wx, wy = vix - vjx, viy - vjy
+        coeffs = [hx * hx + hy * hy,
+                  2 * (wx * hx + wy * hy),
+                  wx * wx + wy * wy + 2 * (dx * hx + dy * hy),
+                  2 * (dx * wx + dy * wy),
+                  dx * dx + dy * dy - reach * reach]
+        tau = _first_entry_time(coeffs, horizon)
+        if tau is None:
+            return None
+        return (self.time + tau, "ball", (i, j))
+
+    def _predict_ball(self, i: int):
+        if self.time >= self.stop_times[i]:
+            return None
+        horizon = self.stop_times[i] - self.time
+        best = (self.stop_times[i], "stop", (i,))
+        if self.table is None:
+            return best
+        (px, py), (vx, vy) = self.state_at(i, self.time)
+        ax, ay = self._acceleration(i)
+        radius = self.balls[i].radius
+
+        # Вдоль каждой оси шар движется монотонно до остановки, поэтому
+        # борт достигается не более одного раза - меньший корень квадратного
+        bounds = ((self.border_thickness + radius,
+                   self.table.width - self.border_thickness - radius),
+                  (self.border_thickness + radius,
+                   self.table.height - self.border_thickness - radius))
+        for axis, (p, v, a) in enumerate(((px, vx, ax), (py, vy, ay))):
+            if v == 0:
+                continue
+            side = 1 if v > 0 else 0
+            gap = bounds[axis][side] - p
+            disc = v * v + 2 * a * gap
+            if disc < 0:
+                continue
+            # Устойчивая форма меньшего корня 0.5*a*t^2 + v*t - gap = 0
+            tau = max(2 * gap / (v + math.copysign(math.sqrt(disc), v)), 0.0)
+            if tau <= horizon and self.time + tau < best[0]:
+                best = (self.time + tau, "cushion", (i, axis, side))
+
+        capture = self.pocket_radius + radius
+        travel = horizon * horizon * self.deceleration / 2
+        hx, hy = 0.5 * ax, 0.5 * ay
+        for k, (qx, qy) in enumerate(self.table.pockets):
+            dx, dy = px - qx, py - qy
+            if math.hypot(dx, dy) - capture > travel:
+                continue
+            coeffs = [hx * hx + hy * hy,
+                      2 * (vx * hx + vy * hy),
+                      vx * vx + vy * vy + 2 * (dx * hx + dy * hy),
+                      2 * (dx * vx + dy * vy),
+                      dx * dx + dy * dy - capture * capture]
+            tau = _first_entry_time(coeffs, horizon)
+            if tau is not None and self.time + tau < best[0]:
+                best = (self.time + tau, "pocket", (i, k))
+        return best
+
+    def _reschedule(self, changed: set[int]):
+        for i in sorted(changed):
+            self.ball_events.pop(i, None)
+            if self.active[i]:
+                event = self._predict_ball(i)
+                if event is not None:
+                    self.ball_events[i] = event
+            for j in range(len(self.balls)):
+                if j == i:
+                    continue
+                key = (min(i, j), max(i, j))
+                self.pair_events.pop(key, None)
+                if self.active[i] and self.active[j]:
+                    event = self._predict_pair(*key)
+                    if event is not None:
+                        self.pair_events[key] = event
+
+    def next_event(self):
+        """Ближайшее событие; при равных временах порядок фиксирован"""
+        candidates = list(self.pair_events.values()) + list(self.ball_events.values())
+        if not candidates:
+            return None
+        return min(candidates)
+
+    # --- Обработка событий ---
+
+    def _resolve(self, event):
+        t, kind, data = event
+        self.time = max(t, self.time)
+        self.event_count += 1
+
+        if kind == "ball":
+            i, j = data
+            (pi, vi), (pj, vj) = self.state_at(i, self.time), self.state_at(j, self.time)
+            nx, ny = pi[0] - pj[0], pi[1] - pj[1]
+            length = math.hypot(nx, ny) or 1.0
+            nx, ny = nx / length, ny / length
+            approach = (vi[0] - vj[0]) * nx + (vi[1] - vj[1]) * ny
+            if approach < 0:
+                impulse = -(1 + self.ball_elasticity) * approach / 2
+                vi = (vi[0] + impulse * nx, vi[1] + impulse * ny)
+                vj = (vj[0] - impulse * nx, vj[1] - impulse * ny)
+            self._set_trajectory(i, pi, vi)
+            self._set_trajectory(j, pj, vj)
+            changed = {i, j}
+        elif kind == "cushion":
+            i, axis, side = data
+            position, velocity = map(list, self.state_at(i, self.time))
+            radius = self.balls[i].radius
+            limit = self.table.width if axis == 0 else self.table.height
+            position[axis] = (self.border_thickness + radius if side == 0
+                              else limit - self.border_thickness - radius)
+            velocity[axis] *= -self.cushion_elasticity
+            self._set_trajectory(i, position, velocity)
+            changed = {i}
+        elif kind == "pocket":
+            i, _ = data
+            position, _ = self.state_at(i, self.time)
+            self._set_trajectory(i, position, (0.0, 0.0))
+            self.active[i] = False
+            self.balls[i].in_pocket = True
+            self.pocketed.append(self.balls[i].number)
+            changed = {i}
+        else:
+            i, = data
+            position, _ = self.state_at(i, self.time)
+            self._set_trajectory(i, position, (0.0, 0.0))
+            changed = {i}
+        self._reschedule(changed)
+
+    def update(self, dt: float):
+        """Обрабатывает события до self.time + dt; сами траектории не трогает"""
+        target = self.time + dt
+        for _ in range(self.max_events):
+            event = self.next_event()
+            if event is None or event[0] > target:
+                break
+            self._resolve(event)
+        self.time = target
+
+    def run_to_rest(self) -> int:
+        """Прогоняет все события до остановки шаров; возвращает их число"""
+        start = self.event_count
+        for _ in range(self.max_events):
+            event = self.next_event()
+            if event is None:
+                break
+            self._resolve(event)
+        return self.event_count - start
@@ -0,0 +1,106 @@
+# src/core/frame_profiler.py
+import time
+from array import array
+
+# Фазы кадра: шаги физики, перенос позиций в сцену, панель счёта, отрисовка Qt
+PHASES = ("physics", "scene", "panel", "paint")
+# Счётчики кадра: шаги физики, тела в движении, контакты за шаг, вызовы
+# Python-обработчиков столкновений
+COUNTERS = ("steps", "active_bodies", "contacts_per_step", "callbacks")
+# frame - сумма времён всех фаз
+COLUMNS = ("frame",) + PHASES + COUNTERS
+
+
+class FrameProfiler:
+    """Времена фаз и счётчики последних capacity кадров в кольцевом буфере.
+
+    Пока профилировщик выключен, вызывающий код проверяет только флаг
+    enabled и ничего не замеряет. begin_frame() открывает кадр, mark()
+    закрывает фазу, начавшуюся с предыдущей отметки. Отрисовка приходит
+    позже из paintEvent через add_time() и попадает в тот же кадр, поэтому
+    строка уходит в буфер только при открытии следующего кадра.
+
+    Буфер - плоский array('d'), а не numpy: профилировщик живёт в игре,
+    и ради него не стоит грузить numpy при запуске.
+    """
+
+    def __init__(self, capacity: int = 600):
+        self.capacity = capacity
+        self.rows = array("d", bytes(8 * capacity * len(COLUMNS)))
+        self.column = {name: i for i, name in enumerate(COLUMNS)}
+        self.index = 0
+        self.count = 0
+        self.enabled = False
+        self.current = None
+        self.last_mark = 0.0
+
+    def set_enabled(self, enabled: bool):
+        if not enabled:
+            self.commit()
+        self.enabled = enabled
+
+    def clear(self):
+        self.index = 0
+        self.count = 0
+        self.current = None
+
+    def begin_frame(self):
+        self.commit()
+        self.current = [0.0] * len(COLUMNS)
+        self.last_mark = time.perf_counter()
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.current[self.column[phase]] += now - self.last_mark
+        self.last_mark = now
+
+    def add_time(self, phase: str, seconds: float):
+        if self.current is not None:
+            self.current[self.column[phase]] += seconds
+
+    def set_counter(self, name: str, value: float):
+        if self.current is not None:
+            self.current[self.column[name]] = value
+
+    def commit(self):
+        if self.current is None:
+            return
+        row = self.current
+        row[0] = sum(row[1:1 + len(PHASES)])
+        width = len(COLUMNS)
+        self.rows[self.index * width:(self.index + 1) * width] = array("d", row)
+        self.index = (self.index + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        self.current = None
+
+    def frames(self) -> list[list[float]]:
+        """Записанные кадры от старых к новым, строки по столбцам COLUMNS; время в секундах"""
+        width = len(COLUMNS)
+        start = self.index if self.count == self.capacity else 0
+        frames = []
+        for k in range(self.count):
+            offset = (start + k) % self.capacity * width
+            frames.append(self.rows[offset:offset + width].tolist())
+        return frames
+
+    def percentiles(self, q: tuple[float, ...] = (50, 99)) -> dict[str, tuple[float, ...]]:
+        frames = self.frames()
+        if not frames:
+            return {}
+        result = {}
+        for i, name in enumerate(COLUMNS):
+            # Ближайший ранг: значение, не превышенное долей q кадров
+            values = sorted(frame[i] for frame in frames)
+            result[name] = tuple(values[min(int(len(values) * p / 100), len(values) - 1)]
+                                 for p in q)
+        return result
+
+    def dump(self, path: str):
+        # CSV: время фаз в мс, счётчики как есть - открывается в таблице или numpy.loadtxt
+        self.commit()
+        timed = 1 + len(PHASES)
+        with open(path, "w") as f:
+            f.write(",".join([f"{name}_ms" for name in COLUMNS[:timed]] + list(COUNTERS)) + "\n")
+            for frame in self.frames():
+                values = [value * 1000 for value in frame[:timed]] + frame[timed:]
+                f.write(",".join(f"{value:.4f}" for value in values) + "\n")
@@ -1,5 +1,9 @@
 # src/core/game_rules.py
-from core.ball import Ball
+from .ball import Ball
+
+# Поля, из которых состоит состояние правил
+SNAPSHOT_FIELDS = ("player1_score", "player2_score", "current_player", "game_state",
+                   "player1_type", "player2_type", "first_ball_pocketed")
 
 class GameRules:
     def __init__(self):
@@ -11,6 +15,13 @@ class GameRules:
         self.player2_type = None  
         self.first_ball_pocketed = None
 
+    def snapshot(self) -> tuple:
+        return tuple(getattr(self, name) for name in SNAPSHOT_FIELDS)
+
+    def restore(self, snapshot: tuple):
+        for name, value in zip(SNAPSHOT_FIELDS, snapshot):
+            setattr(self, name, value)
+
     def check_pocketed_balls(self, balls: list[Ball], table):
         for ball in balls:
             if getattr(ball, 'in_pocket', False):
@@ -0,0 +1,65 @@
+# src/core/match.py
+import time
+from .game_rules import GameRules
+from .shot_log import ShotLog, ShotReplayer
+
+
+class Match:
+    """Партия без Qt: физика и лузы как в игре (ShotReplayer) плюс GameRules.
+
+    Удары сначала пишутся в ShotLog, а потом проигрываются из него, поэтому
+    любую партию сервера можно сохранить и повторить через replay.py.
+    Ход переходит к сопернику, если ничего не забито или биток упал в лузу.
+    """
+
+    def __init__(self, match_id: int, log: ShotLog):
+        self.match_id = match_id
+        self.log = log
+        self.replayer = ShotReplayer(log)
+        self.rules = GameRules()
+        self.started = time.perf_counter()
+        # Удар, который сейчас считается, - второй одновременно не принимается
+        self.busy = False
+
+    @property
+    def finished(self) -> bool:
+        return self.rules.game_state != "playing"
+
+    def state(self) -> dict:
+        rules = self.rules
+        return {
+            "match": self.match_id,
+            "state": rules.game_state,
+            "current_player": rules.current_player,
+            "scores": [rules.player1_score, rules.player2_score],
+            "types": [rules.player1_type, rules.player2_type],
+            "shots": len(self.log),
+            "balls": [[ball.number, *ball.body.position]
+                      for ball in self.replayer.balls if not ball.in_pocket],
+        }
+
+    def shot_slices(self, angle: float, force: float, slice_steps: int):
+        """Удар по частям, как ShotReplayer.play_shot_slices; возвращает итог удара"""
+        if self.finished:
+            raise ValueError("Партия закончена")
+        cue_ball = self.replayer.cue_ball
+        time_ms = (time.perf_counter() - self.started) * 1000
+        self.log.record(cue_ball.body.position, angle, force, time_ms)
+        result = yield from self.replayer.play_shot_slices(slice_steps)
+
+        rules = self.rules
+        player = rules.current_player
+        for number in result.pocketed:
+            if number == 8:
+                rules.handle_8ball_pocketed()
+            else:
+                ball = next(ball for ball in self.replayer.balls if ball.number == number)
+                rules.handle_regular_ball_pocketed(ball)
+        if result.scratch:
+            rules.handle_cue_ball_pocketed()
+        elif not result.pocketed:
+            rules.current_player = 3 - player
+
+        outcome = self.state()
+        outcome.update(pocketed=result.pocketed, scratch=result.scratch, steps=result.steps)
+        return outcome
@@ -0,0 +1,289 @@
+# src/core/numpy_physics.py
+import functools
+import numpy as np
+import pymunk as pm
+from .ball import Ball
+from .table import Table
+
+# Параметры подобраны так, чтобы повторять PhysicsEngine на pymunk:
+# упругость шар-шар 0.95 * 0.95, шар-борт 0.95 * 0.6, толщина борта 25
+BALL_ELASTICITY = 0.95 * 0.95
+CUSHION_ELASTICITY = 0.95 * 0.6
+BORDER_THICKNESS = 25.0
+
+
+class ArrayBody:
+    """Заменитель pm.Body: читает и пишет строку в массивах NumpyPhysicsEngine.
+
+    Нужен, чтобы Ball.update_position, Ball.is_moving и код удара
+    (ball.body.velocity = ...) работали с обоими движками без изменений.
+    """
+
+    def __init__(self, engine: "NumpyPhysicsEngine", index: int):
+        self.engine = engine
+        self.index = index
+
+    @property
+    def position(self) -> pm.Vec2d:
+        x, y = self.engine.positions[self.index]
+        return pm.Vec2d(float(x), float(y))
+
+    @position.setter
+    def position(self, value):
+        self.engine.positions[self.index] = value
+
+    @property
+    def velocity(self) -> pm.Vec2d:
+        vx, vy = self.engine.velocities[self.index]
+        return pm.Vec2d(float(vx), float(vy))
+
+    @velocity.setter
+    def velocity(self, value):
+        self.engine.velocities[self.index] = value
+
+    @property
+    def is_sleeping(self) -> bool:
+        return False
+
+
+def integrate(positions, velocities, active, damping: float, dt: float):
+    """Затухание скорости и перенос позиций (порядок как в cpSpaceStep)"""
+    velocities *= damping ** dt
+    velocities *= active[..., None]
+    positions += velocities * dt
+
+
+@functools.lru_cache(maxsize=8)
+def ball_pairs(n: int):
+    """Индексы (i, j), i < j всех пар из n шаров"""
+    return np.triu_indices(n, 1)
+
+
+# Соседние ячейки сетки "вперёд": каждая пара ячеек просматривается один раз
+GRID_NEIGHBOURS = ((0, 0), (1, 0), (-1, 1), (0, 1), (1, 1))
+
+
+def grid_pairs(positions, active, cell_size: float):
+    """Кандидатные пары (i, j), i < j, для одного стола: шары из соседних ячеек.
+
+    Ячейка не меньше диаметра шара, поэтому касающиеся шары всегда лежат в
+    соседних ячейках, а в одной ячейке помещается лишь несколько центров.
+    Шары сортируются по номеру ячейки, и соседи находятся searchsorted без
+    циклов по шарам - вместо N*(N-1)/2 пар получается O(N).
+    """
+    index = np.flatnonzero(active)
+    if index.size == 0:
+        return index, index
+    cells = np.floor(positions[index] / cell_size).astype(np.int64)
+    cells -= cells.min(axis=0)
+    # Запас по ширине, чтобы сосед x + 1 или x - 1 не переходил на другую строку
+    row = int(cells[:, 0].max()) + 3
+    keys = cells[:, 1] * row + cells[:, 0]
+    order = np.argsort(keys, kind="stable")
+    keys, index = keys[order], index[order]
+
+    first, second = [], []
+    for dx, dy in GRID_NEIGHBOURS:
+        target = keys + dy * row + dx
+        end = np.searchsorted(keys, target, side="right")
+        if dx == 0 and dy == 0:
+            # В своей ячейке - только шары после текущего
+            start = np.arange(1, keys.size + 1)
+        else:
+            start = np.searchsorted(keys, target, side="left")
+        count = end - start
+        for k in range(int(count.max(initial=0))):
+            has = count > k
+            first.append(index[has])
+            second.append(index[start[has] + k])
+    if not first:
+        return index[:0], index[:0]
+    first, second = np.concatenate(first), np.concatenate(second)
+    return np.minimum(first, second), np.maximum(first, second)
+
+
+def resolve_ball_collisions(positions, velocities, active, radii, dt: float,
+                            elasticity: float = BALL_ELASTICITY, pairs=None):
+    """Удары шар-шар; шары одинаковой массы.
+
+    Расстояния считаются для всех пар i < j (или только для pairs из
+    широкой фазы) одной векторной операцией, а импульсы только для
+    реально касающихся пар (их на порядки меньше).
+    Касающиеся пары откатываются к моменту касания внутри шага, чтобы
+    нормаль удара не зависела от того, насколько шары успели проникнуть
+    друг в друга.
+    """
+    first_index, second_index = ball_pairs(positions.shape[-2]) if pairs is None else pairs
+    delta = positions[..., first_index, :] - positions[..., second_index, :]
+    dist_sq = delta[..., 0] ** 2 + delta[..., 1] ** 2
+    contact_dist = radii[..., first_index] + radii[..., second_index]
+    touching = dist_sq < contact_dist * contact_dist
+    touching &= active[..., first_index] & active[..., second_index]
+    hits = np.nonzero(touching)
+    if hits[0].size == 0:
+        return
+    first = hits[:-1] + (first_index[hits[-1]],)
+    second = hits[:-1] + (second_index[hits[-1]],)
+
+    delta = delta[hits]
+    reach = np.broadcast_to(contact_dist, dist_sq.shape)[hits]
+    rel_vel = velocities[first] - velocities[second]
+
+    # Время отката s: |delta - rel_vel * s| = reach, берём положительный корень
+    speed_sq = (rel_vel * rel_vel).sum(axis=1)
+    dot = (delta * rel_vel).sum(axis=1)
+    disc = np.maximum(dot * dot - speed_sq * (dist_sq[hits] - reach * reach), 0)
+    rewind = np.where(speed_sq > 0, (dot + np.sqrt(disc)) / np.maximum(speed_sq, 1e-12), 0)
+    rewind = np.clip(rewind, 0, dt)
+
+    contact = delta - rel_vel * rewind[:, None]
+    contact_len = np.sqrt((contact * contact).sum(axis=1))
+    normals = contact / np.maximum(contact_len, 1e-9)[:, None]
+
+    approach = (rel_vel * normals).sum(axis=1)
+    impulse = np.where(approach < 0, -(1 + elasticity) * approach / 2, 0.0)
+    # После удара шары проходят остаток шага с новыми скоростями; если они
+    # всё равно перекрываются (покоящийся контакт), раздвигаем их поровну
+    shift = impulse * rewind
+    overlap = np.maximum(reach - contact_len - 2 * shift, 0) / 2
+    shift += overlap
+
+    np.add.at(velocities, first, impulse[:, None] * normals)
+    np.add.at(velocities, second, -impulse[:, None] * normals)
+    np.add.at(positions, first, shift[:, None] * normals)
+    np.add.at(positions, second, -shift[:, None] * normals)
+
+
+def cushion_bounds(radii, width: float, height: float,
+                   thickness: float = BORDER_THICKNESS):
+    """Допустимые пределы центров шаров между бортами: (low, high) формы (..., 2)"""
+    radii = radii[..., None]
+    low = thickness + radii + np.zeros(2)
+    high = np.array([width, height]) - thickness - radii
+    return low, high
+
+
+def resolve_cushions(positions, velocities, low, high,
+                     elasticity: float = CUSHION_ELASTICITY):
+    """Отскок от четырёх бортов стола"""
+    clipped = np.clip(positions, low, high)
+    outside = positions - clipped
+    # Отражаем только скорость, направленную дальше в борт
+    bounce = outside * velocities > 0
+    velocities[bounce] *= -elasticity
+    positions[...] = clipped
+
+
+def pocket_free_zone(pockets, radii, pocket_radius: float, width: float, height: float):
+    """Прямоугольник (low, high), шары внутри которого заведомо не достают до луз.
+
+    Каждая луза лежит не дальше d от края стола, поэтому шар, отстоящий от
+    всех краёв больше чем на d + радиус захвата, не может оказаться в лузе.
+    """
+    if len(pockets) == 0:
+        return np.full(2, -np.inf), np.full(2, np.inf)
+    edge_dist = np.minimum.reduce([pockets[:, 0], width - pockets[:, 0],
+                                   pockets[:, 1], height - pockets[:, 1]])
+    margin = edge_dist.max() + pocket_radius + radii.max(initial=0)
+    return np.full(2, margin), np.array([width - margin, height - margin])
+
+
+def capture_pockets(positions, velocities, active, radii, pockets, pocket_radius: float,
+                    zone=None):
+    """Гасит шары, попавшие в лузы; возвращает маску пойманных на этом шаге.
+
+    zone - прямоугольник из pocket_free_zone: расстояния до луз считаются
+    только для шаров у бортов, остальные отсеиваются одним сравнением.
+    """
+    near = active.copy()
+    if zone is not None:
+        near &= ((positions < zone[0]) | (positions > zone[1])).any(axis=-1)
+    candidates = np.nonzero(near)
+    if candidates[0].size == 0:
+        return near
+
+    diff = positions[candidates][:, None, :] - pockets
+    dist_sq = diff[..., 0] ** 2 + diff[..., 1] ** 2
+    reach = pocket_radius + np.broadcast_to(radii, active.shape)[candidates]
+    inside = dist_sq.min(axis=-1) < reach * reach
+
+    captured = np.zeros_like(active)
+    captured[tuple(index[inside] for index in candidates)] = True
+    active &= ~captured
+    velocities[captured] = 0
+    return captured
+
+
+class NumpyPhysicsEngine:
+    """Альтернатива PhysicsEngine, где все шары лежат в непрерывных массивах NumPy.
+
+    Интерфейс тот же: add_ball, add_table, update, is_ball_moving. Шаг
+    состоит из нескольких векторных операций вместо вызовов Chipmunk на
+    каждое тело. Забитые шары помечаются in_pocket, их номера попадают
+    в self.pocketed в порядке попадания. Начиная с grid_threshold шаров
+    пары для ударов берутся из равномерной сетки (grid_pairs), а не все.
+    """
+
+    def __init__(self, grid_threshold: int = 64):
+        self.damping = 0.3
+        self.pocket_radius = 18
+        self.grid_threshold = grid_threshold
+        self.positions = np.zeros((0, 2))
+        self.velocities = np.zeros((0, 2))
+        self.radii = np.zeros(0)
+        self.active = np.zeros(0, dtype=bool)
+        self.balls: list[Ball] = []
+        self.pocketed: list[int] = []
+        self.table = None
+        self.pockets = np.zeros((0, 2))
+        self.low = np.zeros((0, 2))
+        self.high = np.zeros((0, 2))
+
+    def add_ball(self, ball: Ball):
+        index = len(self.balls)
+        self.positions = np.vstack([self.positions, [ball.position]])
+        self.velocities = np.vstack([self.velocities, [ball.velocity]])
+        self.radii = np.append(self.radii, ball.radius)
+        self.active = np.append(self.active, not ball.in_pocket)
+        self.balls.append(ball)
+        ball.body = ArrayBody(self, index)
+        if self.table is not None:
+            self._update_geometry()
+
+    def add_table(self, table: Table):
+        self.table = table
+        self.pockets = np.array(table.pockets, dtype=float)
+        self._update_geometry()
+
+    def _update_geometry(self):
+        self.low, self.high = cushion_bounds(self.radii, self.table.width, self.table.height)
+        self.pocket_zone = pocket_free_zone(self.pockets, self.radii, self.pocket_radius,
+                                            self.table.width, self.table.height)
+
+    def update(self, dt: float):
+        integrate(self.positions, self.velocities, self.active, self.damping, dt)
+        pairs = None
+        if len(self.balls) >= self.grid_threshold:
+            pairs = grid_pairs(self.positions, self.active, 2 * self.radii.max())
+        resolve_ball_collisions(self.positions, self.velocities, self.active, self.radii, dt,
+                                pairs=pairs)
+        if self.table is None:
+            return
+        # Лузы проверяем до выталкивания из бортов, как сенсоры в pymunk
+        captured = capture_pockets(self.positions, self.velocities, self.active,
+                                   self.radii, self.pockets, self.pocket_radius,
+                                   self.pocket_zone)
+        resolve_cushions(self.positions, self.velocities, self.low, self.high)
+        for index in np.flatnonzero(captured):
+            ball = self.balls[index]
+            ball.in_pocket = True
+            self.pocketed.append(ball.number)
+
+    def is_ball_moving(self, ball_body: ArrayBody) -> bool:
+        vx, vy = self.velocities[ball_body.index]
+        return vx * vx + vy * vy > 1
+
+    def any_moving(self, threshold: float = 0.1) -> bool:
+        # Скорость забитых шаров обнулена, поэтому маска active не нужна
+        speed_sq = (self.velocities * self.velocities).sum(axis=1)
+        return bool(speed_sq.max(initial=0) > threshold * threshold)
@@ -2,12 +2,26 @@ import pymunk as pm
 from .ball import Ball
 from .table import Table
 
+# Снимок шаров: по кортежу (x, y, vx, vy, угол, угловая скорость, забит)
+# на каждый шар в порядке добавления в движок
+PhysicsSnapshot = tuple[tuple[float, float, float, float, float, float, bool], ...]
+
 class PhysicsEngine:
     def __init__(self):
         self.space = pm.Space()
         self.space.gravity = (0, 0)
         self.space.damping = 0.3
+        # Медленные шары засыпают и перестают обсчитываться до следующего удара
+        self.space.idle_speed_threshold = 1.0
+        self.space.sleep_time_threshold = 0.5
         self.pocket_radius = 18
+        # Реестр шаров на столе: O(1) поиск шара по фигуре или телу в обработчиках столкновений
+        self.balls_by_shape: dict[pm.Shape, Ball] = {}
+        self.balls_by_body: dict[pm.Body, Ball] = {}
+        # Все шары в порядке добавления, включая забитые - для снимков
+        self.balls: list[Ball] = []
+        # Параметры use_spatial_hash pymunk (размер ячейки, число ячеек), если включён
+        self.spatial_hash = None
         
     def add_ball(self, ball: Ball):
         # Создаем физическое тело шара
@@ -23,6 +37,69 @@ class PhysicsEngine:
         # Добавляем в пространство
         self.space.add(body, shape)
         ball.body = body
+        ball.shape = shape
+        self.balls.append(ball)
+        self.balls_by_shape[shape] = ball
+        self.balls_by_body[body] = ball
+
+    def remove_ball(self, ball: Ball):
+        # Во время шага pymunk сам отложит удаление до его конца
+        shape = ball.shape
+        if shape is None:
+            return
+        if shape.space is self.space:
+            self.space.remove(shape.body, shape)
+        self.balls_by_shape.pop(shape, None)
+        self.balls_by_body.pop(shape.body, None)
+
+    def restore_ball(self, ball: Ball):
+        # Возвращает на стол ранее убранный шар, не создавая тело заново
+        shape = ball.shape
+        if shape is None or shape in self.balls_by_shape:
+            return
+        self.space.add(shape.body, shape)
+        ball.body = shape.body
+        self.balls_by_shape[shape] = ball
+        self.balls_by_body[shape.body] = ball
+
+    def snapshot(self) -> PhysicsSnapshot:
+        """Неизменяемый снимок позиций, скоростей и забитых шаров"""
+        states = []
+        for ball in self.balls:
+            body = ball.shape.body
+            states.append((*body.position, *body.velocity, body.angle,
+                           body.angular_velocity, ball.in_pocket))
+        return tuple(states)
+
+    def restore(self, snapshot: PhysicsSnapshot):
+        """Возвращает шары в состояние снимка, переставляя уже созданные тела"""
+        for ball, (x, y, vx, vy, angle, angular_velocity, in_pocket) in zip(self.balls, snapshot):
+            if in_pocket:
+                self.remove_ball(ball)
+                ball.in_pocket = True
+                continue
+            self.restore_ball(ball)
+            body = ball.shape.body
+            body.position = (x, y)
+            body.velocity = (vx, vy)
+            body.angle = angle
+            body.angular_velocity = angular_velocity
+            self.space.reindex_shapes_for_body(body)
+            ball.in_pocket = False
+            ball.update_position()
+            ball.previous_position = ball.position
+
+    def use_spatial_hash(self, ball_radius: float, ball_count: int):
+        # Для тысяч одинаковых шаров равномерная сетка с ячейкой в диаметр шара
+        # быстрее дерева AABB по умолчанию; ячеек берём с запасом в 10 раз
+        self.spatial_hash = (ball_radius * 2, max(ball_count * 10, 1000))
+        self.space.use_spatial_hash(*self.spatial_hash)
+
+    def ball_for_shape(self, shape: pm.Shape) -> Ball:
+        return self.balls_by_shape.get(shape)
+
+    def ball_for_body(self, body: pm.Body) -> Ball:
+        return self.balls_by_body.get(body)
 
     def add_table(self, table: Table):
         # Добавление стола можно делать напрямую, так как оно происходит при инициализации
@@ -0,0 +1,180 @@
+# src/core/shot_cache.py
+import hashlib
+import math
+import sqlite3
+import struct
+import threading
+from collections import OrderedDict
+from .shot_log import ANGLE_STEPS, FORCE_SCALE
+from .simulation import ShotOutcome
+
+# Параметры симулятора входят в ключ: другой стол или шаг физики - другой исход
+CONTEXT = struct.Struct("<ddddI")
+KEY_BALL = struct.Struct("<Bii")
+KEY_SHOT = struct.Struct("<Ii")
+# Исход: число шагов, число забитых и оставшихся шаров, затем номера
+# забитых по порядку и (номер, x, y) оставшихся
+OUTCOME_HEADER = struct.Struct("<IBB")
+OUTCOME_BALL = struct.Struct("<Bdd")
+# Примерные накладные расходы Python на запись в LRU: объекты bytes, узел словаря
+ENTRY_OVERHEAD = 200
+# Размер кэша в памяти по умолчанию
+DEFAULT_MAX_BYTES = 64 << 20
+
+
+def encode_outcome(outcome: ShotOutcome) -> bytes:
+    parts = [OUTCOME_HEADER.pack(outcome.steps, len(outcome.pocketed), len(outcome.positions)),
+             bytes(outcome.pocketed)]
+    parts += [OUTCOME_BALL.pack(number, *position)
+              for number, position in sorted(outcome.positions.items())]
+    return b"".join(parts)
+
+
+def decode_outcome(data: bytes) -> ShotOutcome:
+    steps, pocketed_count, ball_count = OUTCOME_HEADER.unpack_from(data)
+    offset = OUTCOME_HEADER.size
+    pocketed = list(data[offset:offset + pocketed_count])
+    offset += pocketed_count
+    positions = {}
+    for _ in range(ball_count):
+        number, x, y = OUTCOME_BALL.unpack_from(data, offset)
+        positions[number] = (x, y)
+        offset += OUTCOME_BALL.size
+    return ShotOutcome(positions, pocketed, steps)
+
+
+class ShotCache:
+    """Память исходов ударов перед ShotSimulator.
+
+    Позиции шаров округляются до position_step пикселей, угол и сила - до
+    тех же шагов, что в ShotLog. Считается удар уже из округлённых входных
+    данных, поэтому исход из кэша совпадает с тем, что дал бы симулятор, до
+    последнего бита. Ключ - хеш отсортированных по номеру шаров на столе
+    (забитые в него не попадают), удара и параметров симулятора.
+
+    В памяти исходы хранятся упакованными в LRU не больше max_bytes; если
+    задан path, они же пишутся в SQLite и переживают перезапуск. Один кэш
+    можно звать из нескольких потоков, а файл - делить между процессами.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, path: str = None,
+                 position_step: float = 0.25):
+        self.max_bytes = max_bytes
+        self.position_step = position_step
+        self.entries: OrderedDict[bytes, bytes] = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.db = None
+        if path is not None:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            # В режиме WAL фиксация записи не ждёт fsync, поэтому исход
+            # подтверждается сразу: воркеры пула не вызывают close()
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS outcomes "
+                            "(key BLOB PRIMARY KEY, outcome BLOB NOT NULL)")
+            self.db.commit()
+
+    def quantize(self, state: dict[int, tuple[float, float]], angle: float,
+                 force: float) -> tuple[tuple, int, int]:
+        step = self.position_step
+        balls = tuple(sorted((number, round(x / step), round(y / step))
+                             for number, (x, y) in state.items()))
+        angle_bucket = round(angle % (2 * math.pi) / (2 * math.pi) * ANGLE_STEPS) % ANGLE_STEPS
+        return balls, angle_bucket, round(force * FORCE_SCALE)
+
+    def key(self, simulator, balls: tuple, angle_bucket: int, force_bucket: int) -> bytes:
+        table = simulator.table
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(CONTEXT.pack(table.width, table.height, simulator.dt,
+                                   simulator.ball_radius, simulator.max_steps))
+        digest.update(struct.pack("<d", self.position_step))
+        for ball in balls:
+            digest.update(KEY_BALL.pack(*ball))
+        digest.update(KEY_SHOT.pack(angle_bucket, force_bucket))
+        return digest.digest()
+
+    def simulate(self, simulator, state: dict[int, tuple[float, float]],
+                 angle: float, force: float) -> ShotOutcome:
+        """Исход удара из кэша или от simulator.simulate_uncached на округлённых данных"""
+        balls, angle_bucket, force_bucket = self.quantize(state, angle, force)
+        key = self.key(simulator, balls, angle_bucket, force_bucket)
+        data = self.get(key)
+        if data is not None:
+            return decode_outcome(data)
+
+        step = self.position_step
+        outcome = simulator.simulate_uncached(
+            {number: (x * step, y * step) for number, x, y in balls},
+            angle_bucket * 2 * math.pi / ANGLE_STEPS, force_bucket / FORCE_SCALE)
+        self.put(key, encode_outcome(outcome))
+        return outcome
+
+    def get(self, key: bytes) -> bytes:
+        with self.lock:
+            data = self.entries.get(key)
+            if data is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return data
+            if self.db is not None:
+                row = self.db.execute("SELECT outcome FROM outcomes WHERE key = ?",
+                                      (key,)).fetchone()
+                if row is not None:
+                    self.disk_hits += 1
+                    self._remember(key, row[0])
+                    return row[0]
+            self.misses += 1
+            return None
+
+    def put(self, key: bytes, data: bytes):
+        with self.lock:
+            self._remember(key, data)
+            if self.db is not None:
+                self.db.execute("INSERT OR REPLACE INTO outcomes VALUES (?, ?)", (key, data))
+                self.db.commit()
+
+    def _remember(self, key: bytes, data: bytes):
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.bytes -= len(key) + len(previous) + ENTRY_OVERHEAD
+        self.entries[key] = data
+        self.bytes += len(key) + len(data) + ENTRY_OVERHEAD
+        while self.bytes > self.max_bytes and self.entries:
+            old_key, old_data = self.entries.popitem(last=False)
+            self.bytes -= len(old_key) + len(old_data) + ENTRY_OVERHEAD
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "bytes": self.bytes,
+            }
+
+    def __len__(self):
+        return len(self.entries)
+
+    def close(self):
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
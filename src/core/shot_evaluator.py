@@ -0,0 +1,83 @@
+# src/core/shot_evaluator.py
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Iterable, Iterator
+from .table import Table
+from .simulation import ShotSimulator, ShotOutcome
+from .shot_cache import ShotCache, DEFAULT_MAX_BYTES
+
+# Симулятор живёт в процессе-воркере между задачами: пространство pymunk
+# и стол строятся один раз в initializer, а не на каждый удар
+_worker_simulator: ShotSimulator = None
+
+
+def _init_worker(table: Table, cache_bytes: int, cache_path: str):
+    global _worker_simulator
+    # Кэш в памяти у каждого воркера свой, а файл на диске - общий.
+    # Если задан только файл, память берётся размера по умолчанию: при
+    # нулевом размере каждый исход вытеснялся бы сразу после записи
+    cache = None
+    if cache_bytes or cache_path:
+        cache = ShotCache(cache_bytes or DEFAULT_MAX_BYTES, cache_path)
+    _worker_simulator = ShotSimulator(table, cache=cache)
+
+
+def _simulate_candidate(state: dict[int, tuple[float, float]],
+                        angle: float, force: float) -> "ShotResult":
+    outcome = _worker_simulator.simulate(state, angle, force)
+    return ShotResult(angle, force, outcome)
+
+
+class ShotResult:
+    def __init__(self, angle: float, force: float, outcome: ShotOutcome):
+        self.angle = angle
+        self.force = force
+        self.outcome = outcome
+
+    def __repr__(self):
+        return f"ShotResult(angle={self.angle:.3f}, force={self.force:.0f}, {self.outcome})"
+
+
+def shot_grid(angle_count: int, forces: Iterable[float]) -> list[tuple[float, float]]:
+    """Равномерная сетка кандидатов (угол, сила) по полному кругу"""
+    return [(2 * math.pi * i / angle_count, force)
+            for i in range(angle_count) for force in forces]
+
+
+class ShotEvaluator:
+    """Раскидывает кандидатов-ударов по пулу процессов с безголовыми симуляторами.
+
+    Результаты отдаются по мере готовности; если вызывающий код прекращает
+    перебор (break), оставшиеся задачи отменяются. cache_bytes и cache_path
+    включают в воркерах ShotCache такого размера и с таким файлом; если
+    задан только cache_path, размер в памяти - DEFAULT_MAX_BYTES.
+    """
+
+    def __init__(self, table: Table = None, workers: int = None,
+                 cache_bytes: int = 0, cache_path: str = None):
+        self.table = table if table is not None else Table(width=900, height=450)
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(max_workers=self.workers,
+                                            initializer=_init_worker,
+                                            initargs=(self.table, cache_bytes, cache_path))
+
+    def evaluate(self, state: dict[int, tuple[float, float]],
+                 candidates: Iterable[tuple[float, float]]) -> Iterator[ShotResult]:
+        futures = [self.executor.submit(_simulate_candidate, state, angle, force)
+                   for angle, force in candidates]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,314 @@
+# src/core/shot_log.py
+import math
+import struct
+import time
+from collections import deque
+from .ball import Ball
+from .table import Table
+from .physics import PhysicsEngine
+
+MAGIC = b"BSHL"
+VERSION = 1
+# Заголовок: сигнатура, версия, частота физики, размер стола, позиция битка
+# после падения в лузу, параметры пространственного хеша (0 - не включён),
+# число шаров в начальной расстановке
+HEADER = struct.Struct("<4sBHdddddII")
+# Шар начальной расстановки: номер, радиус, позиция - без округления
+RACK_BALL = struct.Struct("<Hddd")
+# Удар: позиция битка, угол, сила, время от начала партии (мс) - 12 байт
+SHOT = struct.Struct("<HHHHI")
+
+ANGLE_STEPS = 1 << 16
+FORCE_SCALE = 16  # шаг силы 1/16 пикс/с, максимум ~4096
+# Значение поля силы, помечающее отмену последнего удара
+UNDO_FORCE = (1 << 16) - 1
+# Сколько последних ударов можно отменить (одинаково в игре и повторе)
+UNDO_DEPTH = 50
+
+
+def position_scale(width: float, height: float) -> int:
+    """Шагов квантования на пиксель: наибольшая степень двойки, при которой стол влезает в uint16"""
+    scale = 1
+    while max(width, height) * scale * 2 < 1 << 16:
+        scale *= 2
+    return scale
+
+
+class Shot:
+    def __init__(self, cue_position: tuple[float, float], angle: float,
+                 force: float, time_ms: int, undo: bool = False):
+        self.cue_position = cue_position
+        self.angle = angle
+        self.force = force
+        self.time_ms = time_ms
+        # Не удар, а отмена предыдущего: стол возвращается в состояние до него
+        self.undo = undo
+
+    def __repr__(self):
+        if self.undo:
+            return f"Shot(undo, time_ms={self.time_ms})"
+        return (f"Shot(cue={self.cue_position}, angle={self.angle:.4f}, "
+                f"force={self.force:.2f}, time_ms={self.time_ms})")
+
+
+class ShotLog:
+    """Запись партии: точная начальная расстановка и квантованные удары.
+
+    Игра бьёт уже раскодированными значениями из record(), поэтому повтор
+    через ShotReplayer получает ровно те же входные данные, что и живая
+    партия. Отмены ударов тоже пишутся (record_undo), и повтор выполняет
+    их так же, как игра. Траектории не хранятся - их восстанавливает повтор.
+    """
+
+    def __init__(self, table_size: tuple[float, float],
+                 rack: list[tuple[int, float, tuple[float, float]]],
+                 physics_hz: int = 240,
+                 cue_out_position: tuple[float, float] = None,
+                 spatial_hash: tuple[float, int] = None):
+        self.table_size = table_size
+        # (номер, радиус, (x, y)) в порядке добавления в движок
+        self.rack = rack
+        self.physics_hz = physics_hz
+        self.cue_out_position = (cue_out_position if cue_out_position is not None
+                                 else (50, table_size[1] / 2))
+        self.spatial_hash = spatial_hash
+        self.scale = position_scale(*table_size)
+        self.raw_shots: list[tuple[int, int, int, int, int]] = []
+
+    @classmethod
+    def from_balls(cls, table: Table, balls: list[Ball], physics_hz: int = 240,
+                   cue_out_position: tuple[float, float] = None,
+                   spatial_hash: tuple[float, int] = None) -> "ShotLog":
+        rack = [(ball.number, ball.radius, tuple(ball.position)) for ball in balls]
+        return cls((table.width, table.height), rack, physics_hz,
+                   cue_out_position, spatial_hash)
+
+    def __len__(self):
+        return len(self.raw_shots)
+
+    def __getitem__(self, index: int) -> Shot:
+        return self._decode(self.raw_shots[index])
+
+    def __iter__(self):
+        return (self._decode(raw) for raw in self.raw_shots)
+
+    def _decode(self, raw) -> Shot:
+        x, y, angle, force, time_ms = raw
+        return Shot((x / self.scale, y / self.scale),
+                    angle * 2 * math.pi / ANGLE_STEPS, force / FORCE_SCALE, time_ms,
+                    undo=force == UNDO_FORCE)
+
+    def record(self, cue_position: tuple[float, float], angle: float,
+               force: float, time_ms: int) -> Shot:
+        """Квантует и добавляет удар; возвращает то, чем на самом деле нужно бить"""
+        limit = (1 << 16) - 1
+        raw = (min(max(round(cue_position[0] * self.scale), 0), limit),
+               min(max(round(cue_position[1] * self.scale), 0), limit),
+               round(angle % (2 * math.pi) / (2 * math.pi) * ANGLE_STEPS) % ANGLE_STEPS,
+               min(max(round(force * FORCE_SCALE), 0), UNDO_FORCE - 1),
+               min(max(int(time_ms), 0), (1 << 32) - 1))
+        self.raw_shots.append(raw)
+        return self._decode(raw)
+
+    def record_undo(self, time_ms: int):
+        self.raw_shots.append((0, 0, 0, UNDO_FORCE, min(max(int(time_ms), 0), (1 << 32) - 1)))
+
+    def to_bytes(self) -> bytes:
+        cell, count = self.spatial_hash if self.spatial_hash else (0.0, 0)
+        parts = [HEADER.pack(MAGIC, VERSION, self.physics_hz, *self.table_size,
+                             *self.cue_out_position, cell, count, len(self.rack))]
+        parts += [RACK_BALL.pack(number, radius, *position)
+                  for number, radius, position in self.rack]
+        parts += [SHOT.pack(*raw) for raw in self.raw_shots]
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ShotLog":
+        magic, version, physics_hz, width, height, out_x, out_y, cell, count, rack_size = \
+            HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Не запись партии или неподдерживаемая версия")
+        offset = HEADER.size
+        rack = []
+        for _ in range(rack_size):
+            number, radius, x, y = RACK_BALL.unpack_from(data, offset)
+            rack.append((number, radius, (x, y)))
+            offset += RACK_BALL.size
+        log = cls((width, height), rack, physics_hz, (out_x, out_y),
+                  (cell, count) if count else None)
+        if (len(data) - offset) % SHOT.size:
+            raise ValueError("Запись партии обрезана")
+        log.raw_shots = [raw for raw in SHOT.iter_unpack(data[offset:])]
+        return log
+
+    def save(self, path: str):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path: str) -> "ShotLog":
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+def any_ball_moving(balls: list[Ball]) -> bool:
+    return any(ball.is_moving() for ball in balls if not ball.in_pocket)
+
+
+def settle_balls(balls: list[Ball]):
+    """Гасит остаточные скорости в конце удара.
+
+    Присваивание будит тело pymunk, поэтому трогаем только тела с ненулевой
+    скоростью. Общая функция для игры и повтора: удар заканчивается на
+    одном и том же шаге в обоих местах.
+    """
+    for ball in balls:
+        body = ball.body
+        if body and not ball.in_pocket and (body.velocity != (0, 0) or body.angular_velocity):
+            body.velocity = (0, 0)
+            body.angular_velocity = 0
+
+
+class ReplayedShot:
+    def __init__(self, shot: Shot, pocketed: list[int], steps: int, scratch: bool = False):
+        self.shot = shot
+        self.pocketed = pocketed
+        self.steps = steps
+        # Биток падал в лузу и был выставлен в cue_out_position
+        self.scratch = scratch
+
+    def __repr__(self):
+        return f"ReplayedShot(pocketed={self.pocketed}, steps={self.steps}, scratch={self.scratch})"
+
+
+class ShotReplayer:
+    """Повтор записи партии на PhysicsEngine без Qt.
+
+    Движок, шары и обработка луз собираются так же, как в игре, а каждый
+    удар идёт с фиксированным шагом 1/physics_hz до первого шага, на котором
+    все шары стоят - поэтому результат совпадает с живой партией и между
+    запусками бит в бит. speed задаёт темп относительно реального времени
+    (1, 10, ...), None - без ожидания.
+    """
+
+    def __init__(self, log: ShotLog, max_steps_per_shot: int = 100000):
+        self.log = log
+        self.dt = 1.0 / log.physics_hz
+        self.max_steps_per_shot = max_steps_per_shot
+        self.reset()
+
+    def reset(self):
+        width, height = self.log.table_size
+        self.table = Table(width=width, height=height)
+        self.physics = PhysicsEngine()
+        self.physics.add_table(self.table)
+        if self.log.spatial_hash:
+            self.physics.spatial_hash = self.log.spatial_hash
+            self.physics.space.use_spatial_hash(*self.log.spatial_hash)
+        self.balls = [Ball(number, radius, position)
+                      for number, radius, position in self.log.rack]
+        for ball in self.balls:
+            self.physics.add_ball(ball)
+        self.cue_ball = next((ball for ball in self.balls if ball.number == 0), None)
+        self.pocketed: list[int] = []
+        self.scratch = False
+        self.next_shot = 0
+        # Снимки физики перед каждым ударом - для отмен из записи
+        self.undo_stack = deque(maxlen=UNDO_DEPTH)
+
+        handler = self.physics.space.add_collision_handler(1, 2)  # Шары (1) и лузы (2)
+        handler.begin = self._handle_pocket
+
+    def _handle_pocket(self, arbiter, space, data):
+        # Физически то же, что GameCanvas.handle_ball_pocket_collision
+        ball = self.physics.ball_for_shape(arbiter.shapes[0])
+        if ball is None or ball.in_pocket:
+            return True
+        if ball.number == 0:
+            self.scratch = True
+            ball.body.position = self.log.cue_out_position
+            ball.body.velocity = (0, 0)
+            return False
+        ball.in_pocket = True
+        self.pocketed.append(ball.number)
+        self.physics.remove_ball(ball)
+        return ball.number != 8
+
+    def positions(self) -> list[tuple[int, float, float]]:
+        """(номер, x, y) шаров на столе в порядке расстановки: в стресс-раскладках
+        номера повторяются, поэтому словарь по номеру потерял бы шары"""
+        return [(ball.number, *ball.body.position)
+                for ball in self.balls if not ball.in_pocket]
+
+    def play_shot(self, on_step=None, pacer=None) -> ReplayedShot:
+        slices = self.play_shot_slices(self.max_steps_per_shot, on_step, pacer)
+        while True:
+            try:
+                next(slices)
+            except StopIteration as stop:
+                return stop.value
+
+    def play_shot_slices(self, slice_steps: int, on_step=None, pacer=None):
+        """play_shot по частям: генератор отдаёт управление каждые slice_steps
+        шагов, а ReplayedShot возвращает через StopIteration.value. Шаги те же,
+        поэтому результат не зависит от slice_steps"""
+        shot = self.log[self.next_shot]
+        self.next_shot += 1
+        self.pocketed = []
+        self.scratch = False
+        if shot.undo:
+            if self.undo_stack:
+                self.physics.restore(self.undo_stack.pop())
+            return ReplayedShot(shot, [], 0)
+        self.undo_stack.append(self.physics.snapshot())
+        if self.cue_ball is None or self.cue_ball.in_pocket:
+            return ReplayedShot(shot, [], 0)
+
+        body = self.cue_ball.body
+        body.position = shot.cue_position
+        body.velocity = (shot.force * math.cos(shot.angle), shot.force * math.sin(shot.angle))
+        steps = 0
+        while steps < self.max_steps_per_shot:
+            self.physics.update(self.dt)
+            steps += 1
+            if on_step is not None:
+                on_step(self)
+            if pacer is not None:
+                pacer(self.dt)
+            if not any_ball_moving(self.balls):
+                break
+            if steps % slice_steps == 0:
+                yield steps
+        settle_balls(self.balls)
+        return ReplayedShot(shot, list(self.pocketed), steps, self.scratch)
+
+    def replay(self, speed: float = None, on_step=None,
+               time_source=time.perf_counter, sleep=time.sleep) -> list[ReplayedShot]:
+        """Проигрывает все оставшиеся удары; результаты не зависят от speed"""
+        pacer = None
+        if speed:
+            start = time_source()
+            sim_time = [0.0]
+
+            def pacer(dt):
+                sim_time[0] += dt
+                delay = start + sim_time[0] / speed - time_source()
+                if delay > 0:
+                    sleep(delay)
+
+        results = []
+        while self.next_shot < len(self.log):
+            if speed:
+                # Паузы между ударами тоже воспроизводятся в нужном темпе
+                sim_time[0] = max(sim_time[0], self.log[self.next_shot].time_ms / 1000)
+            results.append(self.play_shot(on_step, pacer))
+        return results
+
+    def trajectory(self, index: int) -> list[list[tuple[int, float, float]]]:
+        """Позиции шаров на каждом шаге удара index - восстанавливаются повтором"""
+        self.reset()
+        while self.next_shot < index:
+            self.play_shot()
+        frames = []
+        self.play_shot(on_step=lambda replayer: frames.append(replayer.positions()))
+        return frames
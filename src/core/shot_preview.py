@@ -0,0 +1,87 @@
+# src/core/shot_preview.py
+from .table import Table
+from .simulation import ShotSimulator
+
+
+class ShotPreview:
+    def __init__(self, cue_path: list[tuple[float, float]], target: int,
+                 contact: tuple[float, float], target_path: list[tuple[float, float]],
+                 target_pocketed: bool):
+        # Ломаная битка от точки удара; излом - в точке contact
+        self.cue_path = cue_path
+        # Первый шар, которого коснулся биток, или None
+        self.target = target
+        # Центр битка в момент касания (там рисуется "призрачный шар")
+        self.contact = contact
+        # Ломаная этого шара после касания
+        self.target_path = target_path
+        self.target_pocketed = target_pocketed
+
+    def __repr__(self):
+        return (f"ShotPreview(target={self.target}, cue_points={len(self.cue_path)}, "
+                f"target_points={len(self.target_path)}, pocketed={self.target_pocketed})")
+
+
+class ShotPredictor:
+    """Траектория битка и первого задетого им шара для подсказки при прицеливании.
+
+    Удар прогоняется на своём ShotSimulator с частотой физики игры, но не
+    дольше horizon секунд: для подсказки важно начало пути. Точки берутся
+    каждые sample_every шагов. Расчёт прерывается на ближайшем шаге, как
+    только выставлен cancel, - прицел к этому времени уже сдвинулся.
+    """
+
+    def __init__(self, table: Table = None, physics_hz: int = 240, horizon: float = 2.0,
+                 sample_every: int = 4, ball_radius: float = 15.0):
+        self.simulator = ShotSimulator(table, dt=1 / physics_hz, ball_radius=ball_radius)
+        self.max_steps = round(horizon * physics_hz)
+        self.sample_every = sample_every
+        self.target = None
+        self.contact = None
+
+        handler = self.simulator.physics.space.add_collision_handler(1, 1)
+        handler.begin = self._handle_contact
+
+    def _handle_contact(self, arbiter, space, data):
+        if self.target is None:
+            physics = self.simulator.physics
+            first, second = (physics.ball_for_shape(shape) for shape in arbiter.shapes)
+            if first is not None and second is not None and 0 in (first.number, second.number):
+                cue, other = (first, second) if first.number == 0 else (second, first)
+                self.target = other.number
+                self.contact = tuple(cue.body.position)
+        return True
+
+    def predict(self, state: dict[int, tuple[float, float]], angle: float, force: float,
+                cancel=None) -> ShotPreview:
+        """Предсказание удара; None, если расчёт отменён через cancel.is_set()"""
+        simulator = self.simulator
+        simulator.load_state(state)
+        self.target = None
+        self.contact = None
+        cue_ball = simulator.balls.get(0)
+        if cue_ball is None or 0 not in simulator.on_table:
+            return ShotPreview([], None, None, [], False)
+        simulator.strike(angle, force)
+
+        cue_path = [tuple(cue_ball.body.position)]
+        target_path = []
+        target_ball = None
+        for step in range(1, self.max_steps + 1):
+            if cancel is not None and cancel.is_set():
+                return None
+            simulator.physics.update(simulator.dt)
+            if target_ball is None and self.target is not None:
+                target_ball = simulator.balls[self.target]
+                cue_path.append(self.contact)
+                target_path.append(tuple(target_ball.body.position))
+            stopped = simulator.all_stopped()
+            if step % self.sample_every == 0 or stopped:
+                if 0 in simulator.on_table:
+                    cue_path.append(tuple(cue_ball.body.position))
+                if target_ball is not None and self.target in simulator.on_table:
+                    target_path.append(tuple(target_ball.body.position))
+            if stopped:
+                break
+        return ShotPreview(cue_path, self.target, self.contact, target_path,
+                           self.target in simulator.pocketed)
@@ -0,0 +1,46 @@
+# src/core/sim_clock.py
+import time
+
+
+class SimulationClock:
+    """Часы с фиксированным шагом физики и аккумулятором.
+
+    Каждый кадр advance() говорит, сколько шагов физики нужно сделать,
+    чтобы симуляция не отставала от реального времени, даже если таймер
+    отрисовки сработал с опозданием. Остаток времени меньше шага даёт
+    alpha - долю для интерполяции позиций между двумя последними шагами.
+    """
+
+    def __init__(self, physics_hz: float = 240.0, max_steps_per_frame: int = 16,
+                 time_source=time.perf_counter):
+        self.step = 1.0 / physics_hz
+        self.max_steps_per_frame = max_steps_per_frame
+        self.time_source = time_source
+        self.accumulator = 0.0
+        self.last_time = None
+
+    def advance(self) -> int:
+        now = self.time_source()
+        if self.last_time is None:
+            self.last_time = now
+            return 0
+        self.accumulator += now - self.last_time
+        self.last_time = now
+
+        steps = int(self.accumulator / self.step)
+        if steps > self.max_steps_per_frame:
+            # Не догоняем бесконечно: при долгом подвисании лишнее время
+            # отбрасывается, и симуляция просто идёт медленнее
+            steps = self.max_steps_per_frame
+            self.accumulator = self.step * steps
+        self.accumulator -= steps * self.step
+        return steps
+
+    @property
+    def alpha(self) -> float:
+        return min(self.accumulator / self.step, 1.0)
+
+    def reset(self):
+        """Сбрасывает накопленное время, например после паузы"""
+        self.accumulator = 0.0
+        self.last_time = None
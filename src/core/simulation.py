@@ -0,0 +1,146 @@
+# src/core/simulation.py
+import math
+from .ball import Ball
+from .table import Table
+from .physics import PhysicsEngine
+
+
+class ShotOutcome:
+    def __init__(self,
+                positions: dict[int, tuple[float, float]],
+                pocketed: list[int],
+                steps: int):
+        # Позиции шаров, оставшихся на столе, после полной остановки
+        self.positions = positions
+        # Номера забитых шаров в порядке попадания в лузы
+        self.pocketed = pocketed
+        self.steps = steps
+
+    def __repr__(self):
+        return f"ShotOutcome(pocketed={self.pocketed}, steps={self.steps})"
+
+
+class ShotSimulator:
+    """Прогоняет удар на PhysicsEngine без Qt так быстро, как позволяет процессор.
+
+    Пространство pymunk и стол создаются один раз, между ударами тела шаров
+    только переставляются, поэтому один симулятор можно гонять много раз.
+    С cache (ShotCache) повторные удары из той же расстановки не считаются.
+    """
+
+    def __init__(self, table: Table = None, dt: float = 1/60.0,
+                 max_steps: int = 20000, ball_radius: float = 15.0, cache=None):
+        self.table = table if table is not None else Table(width=900, height=450)
+        self.dt = dt
+        self.max_steps = max_steps
+        self.ball_radius = ball_radius
+        self.cache = cache
+
+        self.physics = PhysicsEngine()
+        self.physics.add_table(self.table)
+
+        self.balls: dict[int, Ball] = {}
+        self.on_table: set[int] = set()
+        self.pocketed: list[int] = []
+
+        handler = self.physics.space.add_collision_handler(1, 2)  # Шары (1) и лузы (2)
+        handler.begin = self._handle_pocket
+
+    def _handle_pocket(self, arbiter, space, data):
+        ball = self.physics.ball_for_shape(arbiter.shapes[0])
+        if ball is None:
+            return False
+        self.pocketed.append(ball.number)
+        self.on_table.discard(ball.number)
+        self.physics.remove_ball(ball)
+        return False
+
+    def _get_ball(self, number: int) -> Ball:
+        ball = self.balls.get(number)
+        if ball is None:
+            ball = Ball(number, self.ball_radius)
+            self.physics.add_ball(ball)
+            self.balls[number] = ball
+            self.on_table.add(number)
+        return ball
+
+    def load_state(self, state: dict[int, tuple[float, float]]):
+        """Расставляет шары по позициям {номер: (x, y)}; остальные убираются со стола"""
+        space = self.physics.space
+        for number in list(self.on_table):
+            if number not in state:
+                self.physics.remove_ball(self.balls[number])
+                self.on_table.discard(number)
+
+        for number, position in state.items():
+            ball = self._get_ball(number)
+            body = ball.body
+            if number not in self.on_table:
+                self.physics.restore_ball(ball)
+                self.on_table.add(number)
+            body.position = position
+            body.velocity = (0, 0)
+            body.angular_velocity = 0
+            body.angle = 0
+            space.reindex_shapes_for_body(body)
+            ball.in_pocket = False
+            ball.update_position()
+        self.pocketed = []
+
+    def active_balls(self) -> list[Ball]:
+        return [self.balls[number] for number in sorted(self.on_table)]
+
+    def all_stopped(self) -> bool:
+        return all(not ball.is_moving() for ball in self.active_balls())
+
+    def strike(self, angle: float, force: float):
+        cue_ball = self.balls.get(0)
+        if cue_ball is None or 0 not in self.on_table:
+            return
+        cue_ball.body.velocity = (force * math.cos(angle), force * math.sin(angle))
+
+    def run_to_rest(self) -> int:
+        steps = 0
+        moving_ball = None
+        while steps < self.max_steps:
+            self.physics.update(self.dt)
+            steps += 1
+            # Сначала проверяем шар, который двигался на прошлом шаге: пока он
+            # катится, полный обход всех шаров не нужен
+            if moving_ball is not None and moving_ball.number in self.on_table \
+                    and moving_ball.is_moving():
+                continue
+            moving_ball = next((ball for ball in self.active_balls() if ball.is_moving()), None)
+            if moving_ball is None:
+                break
+        # Дотормаживаем остатки скорости, чтобы следующий удар начинался из покоя
+        for ball in self.active_balls():
+            ball.body.velocity = (0, 0)
+            ball.body.angular_velocity = 0
+            ball.update_position()
+        return steps
+
+    def simulate(self, state: dict[int, tuple[float, float]],
+                 angle: float, force: float) -> ShotOutcome:
+        if self.cache is not None:
+            return self.cache.simulate(self, state, angle, force)
+        return self.simulate_uncached(state, angle, force)
+
+    def simulate_uncached(self, state: dict[int, tuple[float, float]],
+                          angle: float, force: float) -> ShotOutcome:
+        self.load_state(state)
+        self.strike(angle, force)
+        steps = self.run_to_rest()
+        positions = {ball.number: ball.position for ball in self.active_balls()}
+        return ShotOutcome(positions, list(self.pocketed), steps)
+
+
+def balls_to_state(balls: list[Ball]) -> dict[int, tuple[float, float]]:
+    """Снимок позиций шаров на столе в формате, который принимает simulate_shot"""
+    return {ball.number: tuple(ball.position) for ball in balls if not ball.in_pocket}
+
+
+def simulate_shot(state: dict[int, tuple[float, float]], angle: float, force: float,
+                  table: Table = None) -> ShotOutcome:
+    """Один удар по битку (шар 0) с углом angle (рад) и силой force (пикс/с)"""
+    return ShotSimulator(table).simulate(state, angle, force)
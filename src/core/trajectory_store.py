@@ -0,0 +1,205 @@
+# src/core/trajectory_store.py
+import json
+import os
+import queue
+import threading
+import numpy as np
+from .ball import Ball
+
+VERSION = 1
+FIELDS = ("x", "y", "vx", "vy")
+HEADER_FILE = "header.json"
+STEPS_FILE = "steps.f32"
+INDEX_FILE = "shots.i64"
+# Строка шара, которого нет на столе
+MISSING_BALL = (float("nan"),) * len(FIELDS)
+
+
+class TrajectoryWriter:
+    """Пишет траектории на диск кусками, не задерживая цикл симуляции.
+
+    Каждый шаг - запись фиксированной ширины float32 (x, y, vx, vy) для
+    каждого шара в порядке numbers; шары не на столе пишутся как NaN.
+    Шаги копируются в заранее выделенный буфер, заполненный буфер уходит
+    фоновому потоку на запись, а цикл продолжает в следующем свободном.
+    Ждать приходится, только если диск отстаёт от симуляции на весь пул.
+    """
+
+    def __init__(self, path: str, numbers: list[int], physics_hz: int = 240,
+                 chunk_steps: int = 4096, pool_size: int = 4):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.numbers = list(numbers)
+        self.physics_hz = physics_hz
+        self.chunk_steps = chunk_steps
+
+        self.free_chunks = queue.Queue()
+        for _ in range(pool_size):
+            self.free_chunks.put(np.empty((chunk_steps, len(self.numbers), len(FIELDS)),
+                                          dtype=np.float32))
+        self.full_chunks = queue.Queue()
+        self.chunk = self.free_chunks.get()
+        self.chunk_fill = 0
+        self.last_values = None
+        self.last_sleeping = None
+
+        self.steps = 0
+        self.shot_start = None
+        # (первый шаг, число шагов) каждого удара
+        self.shots: list[tuple[int, int]] = []
+        self.error = None
+
+        self.file = open(os.path.join(path, STEPS_FILE), "wb")
+        self.thread = threading.Thread(target=self._write_loop, daemon=True)
+        self.thread.start()
+
+    def _write_loop(self):
+        while True:
+            item = self.full_chunks.get()
+            if item is None:
+                return
+            chunk, count = item
+            try:
+                if self.error is None:
+                    self.file.write(memoryview(chunk[:count]).cast("B"))
+            except OSError as error:
+                self.error = error
+            self.free_chunks.put(chunk)
+
+    def _flush_chunk(self):
+        if self.chunk_fill:
+            self.full_chunks.put((self.chunk, self.chunk_fill))
+            self.chunk = self.free_chunks.get()
+            self.chunk_fill = 0
+
+    def begin_shot(self):
+        if self.shot_start is not None:
+            self.end_shot()
+        self.shot_start = self.steps
+        # Между ударами тела могли переставить - прошлой строке больше не верим
+        self.last_values = None
+
+    def end_shot(self):
+        if self.shot_start is None:
+            return
+        self.shots.append((self.shot_start, self.steps - self.shot_start))
+        self.shot_start = None
+
+    def append(self, state):
+        """Один шаг: (число шаров, 4) значений или плоский список той же длины"""
+        self.chunk[self.chunk_fill].reshape(-1)[:] = np.ravel(state)
+        self.chunk_fill += 1
+        self.steps += 1
+        if self.chunk_fill == self.chunk_steps:
+            self._flush_chunk()
+
+    def append_balls(self, balls: list[Ball]):
+        # balls в том же порядке, что numbers; строка собирается списком и
+        # копируется в буфер одним присваиванием. Тело, спавшее и на прошлом
+        # шаге, не сдвинулось - берём его из прошлой строки, не читая тело
+        # (на шаге засыпания тело ещё успевает сместиться)
+        previous = self.last_values
+        sleeping = []
+        values = []
+        for i, ball in enumerate(balls):
+            body = ball.body
+            if ball.in_pocket or body is None:
+                sleeping.append(False)
+                values.extend(MISSING_BALL)
+                continue
+            asleep = body.is_sleeping
+            sleeping.append(asleep)
+            if asleep and previous is not None and self.last_sleeping[i]:
+                values.extend(previous[4 * i:4 * i + 4])
+            else:
+                values.extend(body.position)
+                values.extend(body.velocity)
+        self.last_values = values
+        self.last_sleeping = sleeping
+        self.append(values)
+
+    def close(self):
+        self.end_shot()
+        self._flush_chunk()
+        self.full_chunks.put(None)
+        self.thread.join()
+        self.file.close()
+        if self.error is not None:
+            raise self.error
+
+        np.array(self.shots, dtype=np.int64).reshape(-1, 2).tofile(
+            os.path.join(self.path, INDEX_FILE))
+        header = {"version": VERSION, "numbers": self.numbers, "fields": list(FIELDS),
+                  "dtype": "float32", "physics_hz": self.physics_hz, "steps": self.steps}
+        with open(os.path.join(self.path, HEADER_FILE), "w") as f:
+            json.dump(header, f)
+
+    def abort(self):
+        # Запись прервана исключением: останавливаем поток и закрываем файл,
+        # но заголовок не пишем и своих ошибок поверх чужой не бросаем
+        self.full_chunks.put(None)
+        self.thread.join()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class TrajectoryStore:
+    """Чтение архива TrajectoryWriter через numpy.memmap.
+
+    Открытие читает только заголовок и индекс ударов, а срезы вида
+    store.shot(k)[:, b] подгружают с диска лишь нужные страницы. Шары
+    адресуются столбцом b - позицией в расстановке: в стресс-раскладках
+    номера повторяются, и по номеру шар однозначно не найти.
+    """
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, HEADER_FILE)) as f:
+            header = json.load(f)
+        if header["version"] != VERSION:
+            raise ValueError("Неподдерживаемая версия архива траекторий")
+        self.numbers = header["numbers"]
+        self.physics_hz = header["physics_hz"]
+        self.shots = np.fromfile(os.path.join(path, INDEX_FILE), dtype=np.int64).reshape(-1, 2)
+
+        shape = (header["steps"], len(self.numbers), len(FIELDS))
+        if header["steps"] == 0:
+            self.steps = np.empty(shape, dtype=np.float32)
+        else:
+            self.steps = np.memmap(os.path.join(path, STEPS_FILE), dtype=np.float32,
+                                   mode="r", shape=shape)
+
+    def __len__(self):
+        return len(self.shots)
+
+    def shot(self, index: int):
+        """Все шаги удара index: (шаги, шары, 4) без копирования"""
+        start, count = self.shots[index]
+        return self.steps[start:start + count]
+
+    def columns(self, number: int) -> list[int]:
+        """Столбцы всех шаров с номером number"""
+        return [i for i, n in enumerate(self.numbers) if n == number]
+
+    def ball_track(self, index: int, ball: int):
+        """(x, y) шара в столбце ball на каждом шаге удара index"""
+        return self.shot(index)[:, ball, :2]
+
+
+def record_replay(replayer, path: str, **writer_options) -> TrajectoryStore:
+    """Проигрывает всю запись партии и сохраняет траектории каждого удара"""
+    replayer.reset()
+    numbers = [ball.number for ball in replayer.balls]
+    with TrajectoryWriter(path, numbers, replayer.log.physics_hz, **writer_options) as writer:
+        while replayer.next_shot < len(replayer.log):
+            writer.begin_shot()
+            replayer.play_shot(on_step=lambda r: writer.append_balls(r.balls))
+            writer.end_shot()
+    return TrajectoryStore(path)
@@ -0,0 +1,225 @@
+# src/core/win_probability.py
+import math
+import numpy as np
+from typing import Iterator
+from .ball import Ball
+from .table import Table
+from .batch_physics import BatchPhysicsEngine
+
+# Группы шаров: 0 - ещё не распределены
+GROUPS = {None: 0, "solid": 1, "striped": 2}
+# Скорость, ниже которой шары считаются остановившимися. В игре порог 0.1,
+# но последние секунды шары ползут на считанные пиксели и в лузу уже не
+# попадут - для оценки это почти половина шагов впустую
+REST_SPEED = 5.0
+# Столов в очередной пачке продолжений: первая маленькая, чтобы грубая
+# оценка появилась за десятки миллисекунд, дальше пачки крупнее
+BATCH_SIZES = (8, 64, 256)
+
+
+class WinEstimate:
+    def __init__(self, player1: float, rollouts: int, stderr: float, finished: bool):
+        # Вероятность победы первого игрока
+        self.player1 = player1
+        # Сколько продолжений вошло в оценку (включая ещё доигрываемые)
+        self.rollouts = rollouts
+        self.stderr = stderr
+        self.finished = finished
+
+    @property
+    def player2(self) -> float:
+        return 1.0 - self.player1
+
+    def __repr__(self):
+        return (f"WinEstimate(player1={self.player1:.3f}, rollouts={self.rollouts}, "
+                f"stderr={self.stderr:.3f}, finished={self.finished})")
+
+
+class WinProbabilityEstimator:
+    """Оценка шансов на победу методом Монте-Карло.
+
+    Из текущей расстановки на N столах BatchPhysicsEngine разом доигрываются
+    случайные продолжения: каждый игрок бьёт в случайный свой шар через
+    лузу с наименьшим срезом, с разбросом по углу и силе. Правила упрощены
+    как в Match: ход сохраняется, только если забит свой шар без фола;
+    чёрный выигрывает, если своих шаров на столе не осталось.
+
+    После каждого раунда ударов выдаётся уточнённая оценка: партии, ещё не
+    доигранные до конца, оцениваются по числу оставшихся шаров, поэтому
+    первая грубая оценка готова после одного удара на маленькой пачке.
+    """
+
+    def __init__(self, table: Table = None, ball_radius: float = 15.0,
+                 cue_out_position: tuple[float, float] = None, max_shots: int = 40,
+                 max_rollouts: int = 2048, target_stderr: float = 0.015,
+                 dt: float = 1/60.0, seed: int = None):
+        self.table = table if table is not None else Table(width=900, height=450)
+        self.ball_radius = ball_radius
+        self.cue_out_position = (cue_out_position if cue_out_position is not None
+                                 else (50, self.table.height / 2))
+        self.max_shots = max_shots
+        self.max_rollouts = max_rollouts
+        self.target_stderr = target_stderr
+        self.dt = dt
+        self.rng = np.random.default_rng(seed)
+        self.pockets = np.array(self.table.pockets, dtype=float)
+        self.aim_noise = 0.03
+        self.min_force = 300
+        self.max_force = 2000
+        # Не более стольких шагов на удар: застрявший стол не держит пачку
+        self.max_shot_steps = 2000
+
+    def estimate(self, state: dict[int, tuple[float, float]], player1_type: str,
+                 player2_type: str, current_player: int,
+                 cancel=None) -> Iterator[WinEstimate]:
+        """Уточняющиеся оценки до max_rollouts продолжений или target_stderr.
+
+        cancel - threading.Event или любой объект с is_set(): перебор
+        прекращается на ближайшем шаге физики после его установки.
+        """
+        if 0 not in state or 8 not in state:
+            return
+        group1 = GROUPS[player1_type]
+        if group1 == 0 and player2_type is not None:
+            group1 = 3 - GROUPS[player2_type]
+
+        total = total_sq = 0.0
+        done = 0
+        batch = 0
+        while done < self.max_rollouts:
+            count = min(BATCH_SIZES[min(batch, len(BATCH_SIZES) - 1)], self.max_rollouts - done)
+            batch += 1
+            values = None
+            for values in self.play_batch(state, group1, current_player, count, cancel):
+                if cancel is not None and cancel.is_set():
+                    return
+                rollouts = done + count
+                mean = (total + values.sum()) / rollouts
+                mean_sq = (total_sq + (values * values).sum()) / rollouts
+                yield WinEstimate(mean, rollouts, stderr(mean, mean_sq, rollouts), False)
+            # Пачка, прерванная посреди ударов, не доиграна - в итог её не берём
+            if values is None or cancel is not None and cancel.is_set():
+                return
+            total += values.sum()
+            total_sq += (values * values).sum()
+            done += count
+            if stderr(total / done, total_sq / done, done) <= self.target_stderr:
+                break
+        mean = total / done
+        yield WinEstimate(mean, done, stderr(mean, total_sq / done, done), True)
+
+    def play_batch(self, state: dict[int, tuple[float, float]], group1: int,
+                   current_player: int, count: int, cancel=None) -> Iterator[np.ndarray]:
+        """Доигрывает count партий; после каждого раунда ударов отдаёт (count,)
+        значения для первого игрока: 1 или 0 за законченную партию, эвристику
+        за недоигранную"""
+        balls = [Ball(number, self.ball_radius, position) for number, position in state.items()]
+        engine = BatchPhysicsEngine(self.table, balls, count)
+        engine.rest_speed = REST_SPEED
+        numbers = engine.numbers
+        cue = int(np.flatnonzero(numbers == 0)[0])
+        eight = int(np.flatnonzero(numbers == 8)[0])
+        solids = (numbers >= 1) & (numbers <= 7)
+        stripes = (numbers >= 9) & (numbers <= 15)
+        group_columns = np.stack([solids | stripes, solids, stripes])
+
+        groups = np.full(count, group1)
+        players = np.full(count, current_player)
+        winners = np.zeros(count, dtype=int)
+
+        for _ in range(self.max_shots):
+            live = np.flatnonzero(winners == 0)
+            if live.size == 0:
+                break
+            player = players[live]
+            # Группа бьющего: у второго игрока противоположная первому
+            group = np.where((player == 1) | (groups[live] == 0), groups[live], 3 - groups[live])
+            before = engine.active[live].copy()
+            angles, forces = self.choose_shots(engine.positions[live], before,
+                                               group_columns[group], cue, eight)
+            engine.strike(angles, forces, live)
+            for _ in range(self.max_shot_steps):
+                if engine.done.all():
+                    break
+                if cancel is not None and cancel.is_set():
+                    return
+                engine.update(self.dt)
+            engine.velocities[live] = 0
+            engine.done[live] = True
+
+            after = engine.active[live]
+            pocketed = before & ~after
+            scratch = pocketed[:, cue]
+
+            # Первый забитый цветной шар распределяет группы
+            colored = pocketed & group_columns[0]
+            first = np.argmin(np.where(colored, engine.pocket_step[live], np.iinfo(int).max), axis=1)
+            assign = (group == 0) & colored.any(axis=1)
+            group[assign] = np.where(solids[first[assign]], 1, 2)
+            groups[live[assign]] = np.where(player[assign] == 1, group[assign], 3 - group[assign])
+
+            own = group_columns[group]
+            own_potted = (pocketed & own).any(axis=1)
+            cleared = (group != 0) & ~(after & own).any(axis=1)
+            eight_potted = pocketed[:, eight]
+            won = eight_potted & cleared & ~scratch
+            winners[live[eight_potted]] = np.where(won, player, 3 - player)[eight_potted]
+
+            keep_turn = own_potted & ~scratch
+            players[live[~keep_turn]] = 3 - player[~keep_turn]
+
+            # Фол битком: биток выставляется туда же, куда в игре
+            fouled = live[scratch]
+            engine.positions[fouled, cue] = self.cue_out_position
+            engine.active[fouled, cue] = True
+            engine.pocket_step[fouled, cue] = -1
+
+            yield self.values(engine.active, groups, players, winners, group_columns)
+
+    def choose_shots(self, positions: np.ndarray, active: np.ndarray,
+                     own_columns: np.ndarray, cue: int, eight: int) -> tuple[np.ndarray, np.ndarray]:
+        """Простая политика: случайный свой шар (или чёрный, если своих нет)
+        в лузу с наименьшим срезом, с шумом по углу и силе"""
+        count = positions.shape[0]
+        rows = np.arange(count)
+        targets = active & own_columns
+        targets[:, cue] = False
+        no_targets = ~targets.any(axis=1)
+        targets[no_targets, eight] = active[no_targets, eight]
+        keys = self.rng.random(targets.shape)
+        keys[~targets] = -1
+        target = np.argmax(keys, axis=1)
+
+        cue_position = positions[:, cue]
+        target_position = positions[rows, target]
+        to_pocket = self.pockets[None] - target_position[:, None]
+        pocket_dist = np.maximum(np.linalg.norm(to_pocket, axis=2), 1e-9)
+        direction = to_pocket / pocket_dist[..., None]
+        ghost = target_position[:, None] - direction * 2 * self.ball_radius
+        aim = ghost - cue_position[:, None]
+        aim_dist = np.maximum(np.linalg.norm(aim, axis=2), 1e-9)
+        cut_cos = (aim * direction).sum(axis=2) / aim_dist
+        pocket = np.argmax(cut_cos + self.rng.normal(0, 0.1, cut_cos.shape), axis=1)
+
+        aim = aim[rows, pocket]
+        angles = np.arctan2(aim[:, 1], aim[:, 0]) + self.rng.normal(0, self.aim_noise, count)
+        # Сила как у AIPlayer: обоим шарам хватает на свой путь, плюс разброс
+        cut = np.maximum(cut_cos[rows, pocket], 0.2)
+        forces = (aim_dist[rows, pocket] + pocket_dist[rows, pocket] / cut) * 2.5
+        forces *= self.rng.uniform(0.8, 1.25, count)
+        return angles, np.clip(forces, self.min_force, self.max_force)
+
+    def values(self, active: np.ndarray, groups: np.ndarray, players: np.ndarray,
+               winners: np.ndarray, group_columns: np.ndarray) -> np.ndarray:
+        # Недоигранная партия: у кого меньше своих шаров на столе, тот ближе
+        # к победе, плюс немного за право удара
+        remaining1 = (active & group_columns[groups]).sum(axis=1)
+        remaining2 = (active & group_columns[np.where(groups == 0, 0, 3 - groups)]).sum(axis=1)
+        lead = np.where(groups == 0, 0, remaining2 - remaining1)
+        turn = np.where(players == 1, 1, -1)
+        heuristic = np.clip(0.5 + 0.07 * lead + 0.05 * turn, 0.05, 0.95)
+        return np.where(winners == 1, 1.0, np.where(winners == 2, 0.0, heuristic))
+
+
+def stderr(mean: float, mean_sq: float, count: int) -> float:
+    return math.sqrt(max(mean_sq - mean * mean, 0.0) / count)
@@ -0,0 +1,76 @@
+# src/render.py
+"""Запись партии в кадры без окна.
+
+    python src/render.py партия.shots кадры/ --fps 60
+    python src/render.py партия.shots - | ffmpeg -f rawvideo -pixel_format bgra \\
+        -video_size 900x450 -framerate 60 -i - ролик.mp4
+"""
+import argparse
+import os
+import sys
+import time
+from core.shot_log import ShotLog, ShotReplayer
+
+
+def ball_positions(replayer: ShotReplayer) -> list[tuple[float, float]]:
+    return [None if ball.in_pocket or ball.body is None else tuple(ball.body.position)
+            for ball in replayer.balls]
+
+
+def render_game(log: ShotLog, output: str, fps: int = 60, pause: float = 0.5,
+                scale: float = 1.0, workers: int = None) -> int:
+    """Проигрывает запись и рисует каждый physics_hz / fps шаг; возвращает число кадров"""
+    from ui.frame_renderer import FrameRenderer
+
+    replayer = ShotReplayer(log)
+    stride = max(1, round(log.physics_hz / fps))
+    pause_frames = round(pause * fps)
+    with FrameRenderer(replayer.table, replayer.balls, output, scale, workers) as renderer:
+        def hold():
+            # Стол в покое между ударами: один и тот же кадр pause секунд
+            renderer.submit(ball_positions(replayer), repeat=pause_frames)
+
+        step = [0]
+
+        def on_step(replayer):
+            step[0] += 1
+            if step[0] % stride == 0:
+                renderer.submit(ball_positions(replayer))
+
+        hold()
+        while replayer.next_shot < len(log):
+            step[0] = 0
+            replayer.play_shot(on_step=on_step)
+            hold()
+        return renderer.frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Запись партии в кадры PNG или сырой поток")
+    parser.add_argument("path")
+    parser.add_argument("output", help="каталог для PNG, файл .raw или - для stdout")
+    parser.add_argument("--fps", type=int, default=60)
+    parser.add_argument("--pause", type=float, default=0.5,
+                        help="сколько секунд показывать стол между ударами")
+    parser.add_argument("--scale", type=float, default=1.0, help="пикселей на единицу стола")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="потоков отрисовки; по умолчанию по числу ядер")
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtGui import QGuiApplication
+    app = QGuiApplication(sys.argv[:1])
+
+    log = ShotLog.load(args.path)
+    start = time.perf_counter()
+    frames = render_game(log, args.output, args.fps, args.pause, args.scale, args.workers)
+    elapsed = time.perf_counter() - start
+    width, height = (max(1, round(side * args.scale)) for side in log.table_size)
+    # Сводка в stderr: stdout может быть занят самим потоком кадров
+    print(f"{frames} кадров {width}x{height} ({frames / args.fps:.1f} с видео) за "
+          f"{elapsed:.1f} с - в {frames / args.fps / elapsed:.1f} раза быстрее реального времени",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
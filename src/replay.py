@@ -0,0 +1,46 @@
+# src/replay.py
+"""Повтор сохранённой партии без окна: python src/replay.py партия.shots --speed 10"""
+import argparse
+import hashlib
+import struct
+import time
+from core.shot_log import ShotLog, ShotReplayer
+
+
+def positions_digest(positions: list[tuple[int, float, float]]) -> str:
+    # Хеш точных позиций всех шаров по порядку расстановки: совпадает у
+    # запусков, давших одинаковый результат бит в бит
+    data = b"".join(struct.pack("<Hdd", number, x, y) for number, x, y in positions)
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Повтор записи партии")
+    parser.add_argument("path")
+    parser.add_argument("--speed", type=float, default=None,
+                        help="темп относительно реального времени (1, 10, ...); "
+                             "по умолчанию без ожидания")
+    parser.add_argument("--trajectories", metavar="КАТАЛОГ", default=None,
+                        help="сохранить траектории всех ударов для чтения через memmap")
+    args = parser.parse_args()
+
+    log = ShotLog.load(args.path)
+    replayer = ShotReplayer(log)
+    if args.trajectories:
+        # numpy нужен только для архива траекторий
+        from core.trajectory_store import record_replay
+        store = record_replay(replayer, args.trajectories)
+        size = store.steps.nbytes / 2**20
+        print(f"траектории {len(store)} ударов, {store.steps.shape[0]} шагов, "
+              f"{size:.1f} МБ -> {args.trajectories}")
+        replayer.reset()
+    start = time.perf_counter()
+    for index, result in enumerate(replayer.replay(speed=args.speed)):
+        print(f"удар {index + 1}: сила {result.shot.force:.0f}, "
+              f"забиты {result.pocketed or '-'}, шагов {result.steps}")
+    print(f"{len(log)} ударов за {time.perf_counter() - start:.2f} с, "
+          f"позиции {positions_digest(replayer.positions())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+# src/server.py
+"""Сервер партий без окна: много независимых партий в одном процессе.
+
+Протокол - JSON, по строке на запрос и на ответ, через TCP или Unix-сокет.
+Поле "id" запроса возвращается в ответе, поэтому по одному соединению
+можно вести несколько партий сразу:
+
+    {"op": "new"}                                       -> состояние новой партии
+    {"op": "shot", "match": 1, "angle": 0.0, "force": 1500}
+                                                        -> итог, когда шары остановятся
+    {"op": "state", "match": 1}
+    {"op": "close", "match": 1}
+    {"op": "stats"}                                     -> метрики сервера
+
+    python src/server.py --port 8765
+    python src/server.py --unix /tmp/billiards.sock
+"""
+import argparse
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from app import PHYSICS_HZ, init_balls
+from core.match import Match
+from core.shot_log import ShotLog
+from core.table import Table
+
+TABLE_SIZE = (900, 450)
+# Шагов физики за один квант планировщика - около миллисекунды на разбое
+SLICE_STEPS = 32
+# По скольким последним ударам считаются перцентили задержки
+LATENCY_WINDOW = 1000
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class MatchServer:
+    """Партии и планировщик, по очереди продвигающий удары всех партий.
+
+    Каждый удар считается квантами по slice_steps шагов: после кванта удар
+    уходит в конец очереди, а цикл событий успевает обслужить сокеты. Так
+    длинный удар одной партии не задерживает остальные больше чем на квант.
+    Партии без удара в очереди не стоят вовсе, а пустая очередь ждёт
+    asyncio.Event - простаивающий сервер не тратит процессор.
+    """
+
+    def __init__(self, slice_steps: int = SLICE_STEPS, max_matches: int = 10000):
+        self.slice_steps = slice_steps
+        self.max_matches = max_matches
+        self.matches: dict[int, Match] = {}
+        self.next_id = 1
+        # Удары в работе: (партия, генератор квантов, future ответа, время подачи)
+        self.running = deque()
+        self.wakeup = asyncio.Event()
+
+        self.started = time.perf_counter()
+        self.busy_time = 0.0
+        self.matches_created = 0
+        self.matches_finished = 0
+        self.shots_done = 0
+        self.steps_done = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+
+    def new_match(self) -> Match:
+        if len(self.matches) >= self.max_matches:
+            raise ValueError("Достигнут предел числа партий")
+        width, height = TABLE_SIZE
+        table = Table(width=width, height=height)
+        log = ShotLog.from_balls(table, init_balls(width, height), PHYSICS_HZ)
+        match = Match(self.next_id, log)
+        self.matches[match.match_id] = match
+        self.next_id += 1
+        self.matches_created += 1
+        return match
+
+    def get_match(self, match_id) -> Match:
+        match = self.matches.get(match_id)
+        if match is None:
+            raise ValueError(f"Нет партии {match_id}")
+        return match
+
+    async def submit_shot(self, match: Match, angle: float, force: float) -> dict:
+        if not (math.isfinite(angle) and math.isfinite(force)) or force <= 0:
+            raise ValueError("Угол и сила должны быть числами, сила больше нуля")
+        if match.busy:
+            raise ValueError("Предыдущий удар этой партии ещё не закончен")
+        if match.finished:
+            raise ValueError("Партия закончена")
+        match.busy = True
+        future = asyncio.get_running_loop().create_future()
+        self.running.append((match, match.shot_slices(angle, force, self.slice_steps),
+                             future, time.perf_counter()))
+        self.wakeup.set()
+        return await future
+
+    async def run_scheduler(self):
+        while True:
+            if not self.running:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+                continue
+
+            match, slices, future, submitted = self.running.popleft()
+            start = time.perf_counter()
+            try:
+                next(slices)
+            except StopIteration as stop:
+                self.finish_shot(match, future, submitted, stop.value)
+            except Exception as error:
+                match.busy = False
+                if not future.done():
+                    future.set_exception(error)
+            else:
+                self.running.append((match, slices, future, submitted))
+            self.busy_time += time.perf_counter() - start
+            # Квант отработан - даём циклу событий принять запросы и отправить ответы
+            await asyncio.sleep(0)
+
+    def finish_shot(self, match: Match, future, submitted: float, outcome: dict):
+        match.busy = False
+        self.shots_done += 1
+        self.steps_done += outcome["steps"]
+        if match.finished:
+            self.matches_finished += 1
+        latency = time.perf_counter() - submitted
+        self.latencies.append(latency)
+        outcome["latency_ms"] = latency * 1000
+        # Клиент мог отключиться, не дождавшись ответа; партия при этом досчитана
+        if not future.done():
+            future.set_result(outcome)
+
+    def stats(self) -> dict:
+        uptime = time.perf_counter() - self.started
+        return {
+            "uptime_s": uptime,
+            "matches_active": len(self.matches),
+            "matches_created": self.matches_created,
+            "matches_finished": self.matches_finished,
+            "matches_finished_per_s": self.matches_finished / uptime,
+            "shots_done": self.shots_done,
+            "shots_per_s": self.shots_done / uptime,
+            "shots_running": len(self.running),
+            "latency_p50_ms": percentile(self.latencies, 0.5) * 1000,
+            "latency_p99_ms": percentile(self.latencies, 0.99) * 1000,
+            "physics_steps_per_s": self.steps_done / self.busy_time if self.busy_time else 0.0,
+            "busy_share": self.busy_time / uptime,
+        }
+
+    async def dispatch(self, request: dict) -> dict:
+        op = request.get("op")
+        if op == "new":
+            return self.new_match().state()
+        if op == "stats":
+            return self.stats()
+        if op not in ("state", "shot", "close"):
+            raise ValueError(f"Неизвестная операция {op!r}")
+        match = self.get_match(request.get("match"))
+        if op == "state":
+            return match.state()
+        if op == "shot":
+            return await self.submit_shot(match, float(request["angle"]), float(request["force"]))
+        del self.matches[match.match_id]
+        return {"match": match.match_id, "closed": True}
+
+    async def respond(self, line: bytes, writer: asyncio.StreamWriter):
+        request = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Запрос должен быть объектом JSON")
+            reply = await self.dispatch(request)
+        except (ValueError, KeyError, TypeError) as error:
+            reply = {"error": str(error)}
+        if isinstance(request, dict) and "id" in request:
+            reply["id"] = request["id"]
+        writer.write(json.dumps(reply).encode() + b"\n")
+        await writer.drain()
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # Каждый запрос - своя задача: удары разных партий идут параллельно
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(self.respond(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        except ConnectionError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def report_stats(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            stats = self.stats()
+            print(f"партий {stats['matches_active']}, ударов {stats['shots_done']} "
+                  f"({stats['shots_per_s']:.1f}/с), задержка p50 {stats['latency_p50_ms']:.0f} мс "
+                  f"p99 {stats['latency_p99_ms']:.0f} мс, занят {stats['busy_share']:.0%}",
+                  flush=True)
+
+
+async def serve(args):
+    server = MatchServer(args.slice_steps, args.max_matches)
+    if args.unix:
+        listener = await asyncio.start_unix_server(server.handle_client, path=args.unix)
+        where = args.unix
+    else:
+        listener = await asyncio.start_server(server.handle_client, args.host, args.port)
+        where = f"{args.host}:{args.port}"
+    print(f"сервер партий слушает {where}", flush=True)
+    background = [asyncio.create_task(server.run_scheduler())]
+    if args.stats_interval:
+        background.append(asyncio.create_task(server.report_stats(args.stats_interval)))
+    async with listener:
+        await listener.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сервер партий без окна")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", metavar="ПУТЬ", default=None,
+                        help="слушать Unix-сокет вместо TCP")
+    parser.add_argument("--slice-steps", type=int, default=SLICE_STEPS,
+                        help="шагов физики за квант планировщика")
+    parser.add_argument("--max-matches", type=int, default=10000)
+    parser.add_argument("--stats-interval", type=float, default=0,
+                        help="печатать метрики каждые N секунд (0 - не печатать)")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
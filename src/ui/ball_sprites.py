@@ -0,0 +1,76 @@
+# src/ui/ball_sprites.py
+from collections import OrderedDict
+from PyQt6.QtCore import Qt, QRectF
+from PyQt6.QtGui import QBrush, QColor, QPen, QPainter, QPainterPath, QFont, QPixmap
+
+
+def paint_ball(painter: QPainter, number: int, color: tuple[int, int, int],
+               radius: float, x: float = 0, y: float = 0):
+    """Рисует шар с центром в (x, y): круг, полоса для 9-15 и номер"""
+    painter.setPen(QPen(Qt.GlobalColor.black, 1))
+    painter.setBrush(QBrush(QColor(*color)))
+    painter.drawEllipse(QRectF(x - radius, y - radius, radius * 2, radius * 2))
+
+    if 9 <= number <= 15:
+        # Полоса с закругленными краями
+        path = QPainterPath()
+        stripe_width = radius * 1.9
+        stripe_height = radius * 0.6
+        path.addRoundedRect(x - stripe_width/2, y - stripe_height/2,
+                            stripe_width, stripe_height,
+                            stripe_height/2, stripe_height/2)
+        painter.setPen(QPen(Qt.PenStyle.NoPen))
+        painter.setBrush(QBrush(Qt.GlobalColor.white))
+        painter.drawPath(path)
+
+    if number > 0:
+        painter.setFont(QFont("Arial", 10))
+        painter.setPen(Qt.GlobalColor.white if number == 8 else Qt.GlobalColor.black)
+        painter.drawText(QRectF(x - radius, y - radius, radius * 2, radius * 2),
+                         Qt.AlignmentFlag.AlignCenter, str(number))
+
+
+class BallSpriteCache:
+    """Растеризованные спрайты шаров, по одному на (шар, масштаб вида).
+
+    Спрайт рисуется в пикселях экрана с учётом масштаба и devicePixelRatio,
+    поэтому в сцене выводится один к одному без сглаживания на лету.
+    Размер кэша ограничен: при частых изменениях размера окна старые
+    масштабы вытесняются первыми.
+    """
+
+    def __init__(self, max_size: int = 64):
+        self.max_size = max_size
+        self.sprites = OrderedDict()
+
+    def get(self, number: int, color: tuple[int, int, int],
+            radius: float, scale: float) -> QPixmap:
+        key = (number, tuple(color), radius, round(scale, 3))
+        pixmap = self.sprites.get(key)
+        if pixmap is not None:
+            self.sprites.move_to_end(key)
+            return pixmap
+
+        pixmap = self.render(number, color, radius, scale)
+        self.sprites[key] = pixmap
+        while len(self.sprites) > self.max_size:
+            self.sprites.popitem(last=False)
+        return pixmap
+
+    def render(self, number: int, color: tuple[int, int, int],
+               radius: float, scale: float) -> QPixmap:
+        # Запас в 1 пиксель под обводку по краю круга
+        size = radius * 2 + 2
+        pixmap = QPixmap(max(1, round(size * scale)), max(1, round(size * scale)))
+        pixmap.fill(Qt.GlobalColor.transparent)
+        pixmap.setDevicePixelRatio(scale)
+
+        painter = QPainter(pixmap)
+        painter.setRenderHints(QPainter.RenderHint.Antialiasing |
+                               QPainter.RenderHint.TextAntialiasing)
+        paint_ball(painter, number, color, radius, size / 2, size / 2)
+        painter.end()
+        return pixmap
+
+    def clear(self):
+        self.sprites.clear()
@@ -0,0 +1,177 @@
+# src/ui/frame_renderer.py
+import os
+import queue
+import shutil
+import threading
+from PyQt6.QtCore import Qt, QPointF
+from PyQt6.QtGui import QImage, QPainter
+from core.ball import Ball
+from core.table import Table
+from ui.ball_sprites import paint_ball
+from ui.table_painter import paint_table
+
+# Формат кадра: 0xffRRGGBB, в памяти байты B, G, R, 0xff (bgra для ffmpeg)
+FRAME_FORMAT = QImage.Format.Format_RGB32
+# Качество PNG в Qt - обратная степень сжатия: 80 даёт быстрый zlib ценой
+# чуть большего размера файла
+PNG_QUALITY = 80
+
+
+class FrameRenderer:
+    """Рисует кадры партии в QImage без окна теми же функциями, что и GameCanvas.
+
+    Стол растеризуется один раз в фон, шары - один раз в спрайты, а кадр -
+    это фон и спрайты поверх по позициям шаров. Изображения берутся из
+    заранее выделенного пула и возвращаются в него после записи; рисуют
+    несколько потоков (QPainter по QImage работает в любом потоке, а PyQt
+    отпускает GIL на время вызовов Qt).
+
+    output - каталог для последовательности PNG или файл .raw / "-" (stdout)
+    для сырого потока кадров подряд, который можно отдать ffmpeg. Нужен уже
+    созданный QGuiApplication: номера на шарах рисуются шрифтом.
+    """
+
+    def __init__(self, table: Table, balls: list[Ball], output: str,
+                 scale: float = 1.0, workers: int = None, pool_size: int = None):
+        self.scale = scale
+        self.width = max(1, round(table.width * scale))
+        self.height = max(1, round(table.height * scale))
+        self.raw = output == "-" or output.endswith(".raw")
+        self.output = output
+        self.frames = 0
+        self.error = None
+
+        self.background = QImage(self.width, self.height, FRAME_FORMAT)
+        painter = QPainter(self.background)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.scale(scale, scale)
+        paint_table(painter, table)
+        painter.end()
+
+        # Спрайт и смещение его левого верхнего угла от центра шара - по порядку balls
+        self.sprites = [self._render_sprite(ball) for ball in balls]
+
+        workers = workers or os.cpu_count() or 1
+        # Пул берётся главным потоком в порядке кадров, поэтому сырой поток
+        # всегда может записать очередной кадр и не ждёт застрявших позже
+        self.pool = queue.Queue()
+        for _ in range(pool_size or workers * 2 + 2):
+            self.pool.put(QImage(self.width, self.height, FRAME_FORMAT))
+        self.jobs = queue.Queue()
+        self.threads = [threading.Thread(target=self._render_loop, daemon=True)
+                        for _ in range(workers)]
+
+        if self.raw:
+            self.stream = (os.fdopen(os.dup(1), "wb") if output == "-"
+                           else open(output, "wb"))
+            self.done = queue.Queue()
+            self.writer = threading.Thread(target=self._write_loop, daemon=True)
+            self.writer.start()
+        else:
+            os.makedirs(output, exist_ok=True)
+        for thread in self.threads:
+            thread.start()
+
+    def _render_sprite(self, ball: Ball) -> tuple[QImage, float]:
+        # Как в BallSpriteCache: запас в 1 пиксель под обводку по краю круга
+        size = ball.radius * 2 + 2
+        pixels = max(1, round(size * self.scale))
+        sprite = QImage(pixels, pixels, QImage.Format.Format_ARGB32_Premultiplied)
+        sprite.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(sprite)
+        painter.setRenderHints(QPainter.RenderHint.Antialiasing |
+                               QPainter.RenderHint.TextAntialiasing)
+        painter.scale(self.scale, self.scale)
+        paint_ball(painter, ball.number, ball.color, ball.radius, size / 2, size / 2)
+        painter.end()
+        return sprite, size / 2
+
+    def submit(self, positions: list[tuple[float, float]], repeat: int = 1):
+        """Ставит в очередь repeat одинаковых кадров: (x, y) каждого шара по порядку
+        или None, если шара нет. Повторы рисуются и кодируются один раз"""
+        if self.error is not None:
+            raise self.error
+        if repeat < 1:
+            return
+        image = self.pool.get()
+        self.jobs.put((self.frames, repeat, list(positions), image))
+        self.frames += repeat
+
+    def _paint(self, image: QImage, positions, background, sprites):
+        painter = QPainter(image)
+        painter.drawImage(0, 0, background)
+        scale = self.scale
+        for position, (sprite, offset) in zip(positions, sprites):
+            if position is not None:
+                painter.drawImage(QPointF((position[0] - offset) * scale,
+                                          (position[1] - offset) * scale), sprite)
+        painter.end()
+
+    def _render_loop(self):
+        # У каждого потока свои копии фона и спрайтов: QImage не разделяют между потоками
+        background = self.background.copy()
+        sprites = [(sprite.copy(), offset) for sprite, offset in self.sprites]
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            index, repeat, positions, image = job
+            try:
+                if self.error is None:
+                    self._paint(image, positions, background, sprites)
+                    if not self.raw:
+                        path = self.frame_path(index)
+                        if not image.save(path, "PNG", PNG_QUALITY):
+                            raise OSError(f"Не удалось записать {path}")
+                        for k in range(1, repeat):
+                            shutil.copyfile(path, self.frame_path(index + k))
+            except Exception as error:
+                self.error = error
+            if self.raw:
+                self.done.put((index, repeat, image))
+            else:
+                self.pool.put(image)
+
+    def frame_path(self, index: int) -> str:
+        return os.path.join(self.output, f"frame_{index:06d}.png")
+
+    def _write_loop(self):
+        # Потоки заканчивают кадры вразнобой, а в сырой поток они идут по порядку
+        pending = {}
+        next_index = 0
+        while True:
+            item = self.done.get()
+            if item is None:
+                return
+            index, repeat, image = item
+            pending[index] = (repeat, image)
+            while next_index in pending:
+                repeat, image = pending.pop(next_index)
+                try:
+                    if self.error is None:
+                        bits = image.constBits()
+                        bits.setsize(image.sizeInBytes())
+                        for _ in range(repeat):
+                            self.stream.write(bits)
+                except OSError as error:
+                    self.error = error
+                self.pool.put(image)
+                next_index += repeat
+
+    def close(self):
+        for _ in self.threads:
+            self.jobs.put(None)
+        for thread in self.threads:
+            thread.join()
+        if self.raw:
+            self.done.put(None)
+            self.writer.join()
+            self.stream.close()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,32 +1,66 @@
 # src/ui/game_canvas.py
 from PyQt6.QtWidgets import (QGraphicsView, QGraphicsScene, QGraphicsLineItem, 
-                            QGraphicsEllipseItem, QGraphicsSimpleTextItem, QWidget, QGraphicsPathItem, QApplication)
-from PyQt6.QtCore import Qt, QPointF, QLineF, pyqtSignal
+                            QGraphicsEllipseItem, QGraphicsSimpleTextItem, QWidget, QGraphicsPathItem, QApplication,
+                            QGraphicsPixmapItem, QFileDialog)
+from PyQt6.QtCore import Qt, QPointF, QLineF, QRect, pyqtSignal
 from PyQt6.QtGui import (QBrush, QColor, QPen, QRadialGradient, QPainter, QPainterPath, QAction,
-                         QFont, QLinearGradient)
+                         QFont, QFontMetrics, QLinearGradient, QKeySequence, QGradient)
 import pymunk as pm
 import math
-from core.physics import PhysicsEngine
+import copy
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from core.ball import Ball
 from core.game_rules import GameRules
+from core.ai_player import AIPlayer
+from core.shot_preview import ShotPredictor
+from core.simulation import balls_to_state
+from core.shot_log import ShotLog, UNDO_DEPTH, settle_balls
+from core.frame_profiler import FrameProfiler, COLUMNS, PHASES
+from ui.ball_sprites import BallSpriteCache
+from ui.table_painter import paint_table
 from PyQt6.QtCore import QTimer
 from PyQt6.QtGui import QPixmap, QImage
 
+def polyline_path(points) -> QPainterPath:
+    path = QPainterPath()
+    if points:
+        path.moveTo(*points[0])
+        for point in points[1:]:
+            path.lineTo(*point)
+    return path
+
+
 class GameCanvas(QGraphicsView):
     game_over_signal = pyqtSignal(int)
+    # Сигнал для главного окна: нужно снова запустить таймер игрового цикла
+    activity_signal = pyqtSignal()
+    # Оценка шансов из фонового потока: (поколение, WinEstimate или None)
+    win_estimate_signal = pyqtSignal(int, object)
+    # Подсказка траектории из фонового потока: (поколение, ShotPreview)
+    preview_signal = pyqtSignal(int, object)
     
-    def __init__(self, physics, table, balls, parent=None):
+    def __init__(self, physics, table, balls, parent=None, physics_hz=240):
         super().__init__(parent)
         self.setRenderHints(QPainter.RenderHint.Antialiasing | 
                           QPainter.RenderHint.TextAntialiasing | 
                           QPainter.RenderHint.SmoothPixmapTransform)
-        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.FullViewportUpdate)
+        # Перерисовываются только области движущихся шаров и кия, а стол
+        # берётся из закэшированного фона (см. drawBackground)
+        self.setViewportUpdateMode(QGraphicsView.ViewportUpdateMode.MinimalViewportUpdate)
+        self.setCacheMode(QGraphicsView.CacheModeFlag.CacheBackground)
         self.setOptimizationFlag(QGraphicsView.OptimizationFlag.DontAdjustForAntialiasing, True)
+        self.setOptimizationFlag(QGraphicsView.OptimizationFlag.DontSavePainterState, True)
         self.setMinimumSize(800, 450)
 
         
         self.scene = QGraphicsScene(self)
         self.scene.setSceneRect(0, 0, table.width, table.height)
+        # Почти все элементы сцены - движущиеся шары: BSP-индекс пришлось бы
+        # перестраивать на каждом кадре
+        self.scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.NoIndex)
         self.setScene(self.scene)
         
         self.game_rules = GameRules() 
@@ -35,11 +69,19 @@ class GameCanvas(QGraphicsView):
         self.table = table
         self.initial_balls = balls.copy()
         self.balls = balls
-        self.pockets = []
         
         self.drag_start = None
-        self.cue_line = None
         self.cue_ball = balls[0] if balls else None
+        # Графические элементы шаров, создаются один раз на шар
+        self.ball_items = {}
+        self.sprite_cache = BallSpriteCache()
+        self.sprite_cache_scale = None
+        # Доля шага физики для интерполяции позиций шаров при отрисовке
+        self.render_alpha = 1.0
+        # Шары, не спавшие на прошлом кадре, и забитые, но ещё не убранные
+        # со стола: по ним идут покадровые обходы вместо всех шаров
+        self.awake_balls = list(balls)
+        self.potted_pending = []
         
         # Игровые параметры
         self.player1_score = 0
@@ -52,11 +94,15 @@ class GameCanvas(QGraphicsView):
 
         self.scene = QGraphicsScene(self)
         self.scene.setSceneRect(0, 0, table.width, table.height)
+        # Почти все элементы сцены - движущиеся шары: BSP-индекс пришлось бы
+        # перестраивать на каждом кадре
+        self.scene.setItemIndexMethod(QGraphicsScene.ItemIndexMethod.NoIndex)
         self.setScene(self.scene)
 
         self.draw_table()
         self.update_balls()
         self.setup_collision_handler()
+        self.create_aim_items()
 
         self.allow_cue_ball_reposition = False
         
@@ -66,79 +112,152 @@ class GameCanvas(QGraphicsView):
 
         self.potted_balls_order = []
 
+        # Физика идёт только от удара до полной остановки шаров, поэтому
+        # партия однозначно задаётся начальной расстановкой и ударами
+        self.physics_hz = physics_hz
+        self.resting = True
+        self.start_shot_log()
+        # Снимки перед каждым ударом для отмены и снимок начала для сброса
+        self.undo_stack = deque(maxlen=UNDO_DEPTH)
+        self.initial_state = self.snapshot_state()
+
+        # Профилировщик кадров и его панель поверх стола (F3)
+        self.profiler = FrameProfiler()
+        # Вызовы Python-обработчиков столкновений - счётчик для профилировщика
+        self.collision_callbacks = 0
+        self.profiler_hud_lines = []
+        self.profiler_hud_time = 0.0
+        self.profiler_hud_font = QFont("Monospace", 9)
+        self.profiler_hud_font.setStyleHint(QFont.StyleHint.TypeWriter)
+        self.profiler_hud_rect = QRect()
+
+        # Компьютерный соперник (включается из контекстного меню)
+        self.ai_player = None
+        self.ai_player_number = 2
+        self.ai_executor = None
+        self.ai_future = None
+
+        # Шансы на победу (включаются из контекстного меню). Поколение растёт
+        # при каждой отмене, и запоздавшие оценки старого расклада отбрасываются
+        self.win_estimator = None
+        self.win_executor = None
+        self.win_cancel = None
+        self.win_generation = 0
+        self.win_pending = False
+
+        # Прицеливание: события мыши копятся в aim_pos, а кий и подсказка
+        # пересчитываются один раз за проход цикла событий (aim_timer).
+        # Траектория считается в фоновом потоке по снимку стола aim_state
+        self.aim_pos = None
+        self.aim_state = None
+        self.aim_timer = QTimer(self)
+        self.aim_timer.setSingleShot(True)
+        self.aim_timer.setInterval(0)
+        self.aim_timer.timeout.connect(self.update_aim)
+        self.preview_predictor = None
+        self.preview_executor = None
+        self.preview_future = None
+        self.preview_cancel = None
+        self.preview_generation = 0
+        self.preview_signal.connect(self.show_preview)
+
         self.setContextMenuPolicy(Qt.ContextMenuPolicy.ActionsContextMenu)
     
         restart_action = QAction("Начать заново", self)
         restart_action.triggered.connect(self.reset_game)
         self.addAction(restart_action)
+
+        undo_action = QAction("Отменить удар", self)
+        undo_action.setShortcut(QKeySequence.StandardKey.Undo)
+        undo_action.triggered.connect(self.undo_shot)
+        self.addAction(undo_action)
+
+        save_log_action = QAction("Сохранить запись партии...", self)
+        save_log_action.triggered.connect(self.save_shot_log)
+        self.addAction(save_log_action)
+
+        profiler_action = QAction("Профилировщик кадров", self)
+        profiler_action.setCheckable(True)
+        profiler_action.setShortcut(QKeySequence(Qt.Key.Key_F3))
+        profiler_action.toggled.connect(self.set_profiler_enabled)
+        self.addAction(profiler_action)
+
+        save_profile_action = QAction("Сохранить профиль кадров...", self)
+        save_profile_action.triggered.connect(self.save_frame_profile)
+        self.addAction(save_profile_action)
+
+        ai_action = QAction("Играть против компьютера", self)
+        ai_action.setCheckable(True)
+        ai_action.toggled.connect(self.set_ai_enabled)
+        self.addAction(ai_action)
+
+        win_action = QAction("Шансы на победу", self)
+        win_action.setCheckable(True)
+        win_action.toggled.connect(self.set_win_probability_enabled)
+        self.addAction(win_action)
+
+        preview_action = QAction("Подсказка траектории", self)
+        preview_action.setCheckable(True)
+        preview_action.toggled.connect(self.set_preview_enabled)
+        self.addAction(preview_action)
+        preview_action.setChecked(True)
         
         exit_action = QAction("Выход", self)
         exit_action.triggered.connect(lambda: QApplication.instance().quit())
         self.addAction(exit_action)
 
-    def reset_game(self):
-        # Полная очистка физического пространства
-        for body in self.physics.space.bodies:
-            self.physics.space.remove(body)
-        for shape in self.physics.space.shapes:
-            self.physics.space.remove(shape)
-        
-        # Пересоздаем физический движок
-        self.physics = PhysicsEngine()
-        
-        # Восстанавливаем стол
-        self.physics.add_table(self.table)
-        
-        # Полностью пересоздаем шары из начальных параметров
-        self.balls = []
-        
-        # Биток (белый шар)
-        cue_ball = Ball(0, 15, (300, self.table.height/2))
-        self.physics.add_ball(cue_ball)
-        self.balls.append(cue_ball)
-        self.cue_ball = cue_ball
-        
-        # Цветные шары в треугольнике
-        ball_radius = 15
-        pyramid_order = [
-            [1],            # первый ряд
-            [2, 9],         # второй ряд
-            [3, 7, 8],      # третий ряд
-            [10, 6, 4, 5],  # четвертый ряд
-            [11, 15, 14, 12, 13]  # пятый ряд
-        ]
-        
-        start_x, start_y = 600, self.table.height/2
-        spacing = ball_radius * 2.2
-
-        for row in range(len(pyramid_order)):
-            for col in range(len(pyramid_order[row])):
-                ball_num = pyramid_order[row][col]
-                x = start_x + row * spacing * math.cos(math.pi/6)
-                y = start_y + (col - row/2) * spacing
-                ball = Ball(ball_num, ball_radius, (x, y))
-                self.physics.add_ball(ball)
-                self.balls.append(ball)
-        
-        # Полный сброс игрового состояния
-        self.player1_score = 0
-        self.player2_score = 0
-        self.current_player = 1
-        self.last_potted_player = None
-        self.potted_balls_order = []
-        self.game_rules = GameRules()
-        self.allow_cue_ball_reposition = False
-        self.dragging_cue_ball = False
-        
-        # Очистка сцены от графических элементов
-        for item in self.scene.items():
-            if not hasattr(item, 'is_table_item'):
-                self.scene.removeItem(item)
-        
-        # Перерисовка стола и шаров
-        self.draw_table()
+    def snapshot_state(self):
+        # Снимок всей партии: физика, правила и счёт на холсте - только кортежи
+        return (self.physics.snapshot(), self.game_rules.snapshot(),
+                (self.player1_score, self.player2_score, self.current_player,
+                 self.last_potted_player, tuple(self.potted_balls_order),
+                 self.allow_cue_ball_reposition, self.dragging_cue_ball))
+
+    def restore_state(self, state):
+        physics_state, rules_state, canvas_state = state
+        self.physics.restore(physics_state)
+        self.game_rules.restore(rules_state)
+        (self.player1_score, self.player2_score, self.current_player,
+         self.last_potted_player, potted, self.allow_cue_ball_reposition,
+         self.dragging_cue_ball) = canvas_state
+        self.potted_balls_order = list(potted)
+
+        # Шары, забитые после снимка, возвращаются на стол вместе со своими элементами
+        self.balls = [ball for ball in self.initial_balls if not ball.in_pocket]
+        for ball in self.initial_balls:
+            ball_item = self.ball_items.get(ball)
+            if ball_item is not None:
+                ball_item.setVisible(not ball.in_pocket)
+                ball_item.last_pos = None
+        self.awake_balls = list(self.balls)
+        self.potted_pending = []
+        if self.ai_future is not None:
+            self.ai_future.cancel()
+            self.ai_future = None
+        self.cancel_win_estimate()
+        self.win_pending = True
+        self.hide_aim()
+        self.resting = True
         self.update_balls()
-        self.setup_collision_handler()
+        self.activity_signal.emit()
+
+    def reset_game(self):
+        # Тела, шары и элементы сцены не пересоздаются: достаточно вернуть
+        # снимок начала партии
+        self.undo_stack.clear()
+        self.restore_state(self.initial_state)
+        self.start_shot_log()
+
+    def undo_shot(self):
+        # Отменять можно, только пока шары стоят. Ход компьютера отменяется
+        # вместе с ходом игрока, иначе компьютер сразу ударил бы снова
+        if not self.resting:
+            return
+        while self.undo_stack:
+            self.restore_state(self.undo_stack.pop())
+            self.shot_log.record_undo(self.elapsed_ms())
+            if not self.is_ai_turn():
+                break
 
     def setup_collision_handler(self):
             # Обработчик столкновений шаров с лузами
@@ -150,288 +269,579 @@ class GameCanvas(QGraphicsView):
         ball_handler.begin = self.handle_ball_collision
         ball_handler.pre_solve = self.handle_ball_collision
 
-    def create_table_brush(self):
-        gradient = QRadialGradient(self.table.width/2, self.table.height/2, 
-                                max(self.table.width, self.table.height)/1.5)
-        gradient.setColorAt(0, QColor(0, 100, 0))
-        gradient.setColorAt(0.5, QColor(0, 80, 0))
-        gradient.setColorAt(1, QColor(0, 60, 0))
-        return QBrush(gradient)
-
     def draw_table(self):
-        # Основное поле
-        self.table_rect = self.scene.addRect(0, 0, self.table.width, self.table.height,
-                        QPen(Qt.PenStyle.NoPen),
-                        self.create_table_brush())
-        
-        # Борта
-        border_brush = QBrush(QColor(101, 67, 33)) 
-        border_pen = QPen(QColor(70, 50, 20), 2)   
-        
-        self.border_top = self.scene.addRect(0, 0, self.table.width, 20, border_pen, border_brush)
-        self.border_bottom = self.scene.addRect(0, self.table.height-20, self.table.width, 20, border_pen, border_brush)
-        self.border_left = self.scene.addRect(0, 0, 20, self.table.height, border_pen, border_brush)
-        self.border_right = self.scene.addRect(self.table.width-20, 0, 20, self.table.height, border_pen, border_brush)
-
-        # Лунки
-        pocket_brush = QBrush(QColor(0, 0, 0))
-        for pos in self.table.pockets:
-            pocket = self.scene.addEllipse(
-                pos[0]-20, pos[1]-20, 40, 40,
-                QPen(Qt.PenStyle.NoPen), pocket_brush
-            )
-            pocket.is_pocket = True 
-            self.pockets.append(pocket)
-
-        # Подписи элементов стола для последующего удаления
-        self.table_rect.is_table_item = True
-        self.border_top.is_table_item = True
-        self.border_bottom.is_table_item = True
-        self.border_left.is_table_item = True
-        self.border_right.is_table_item = True
-        
-        for pocket in self.pockets:
-            pocket.is_table_item = True
+        # Стол не состоит из элементов сцены: он рисуется в drawBackground
+        # и кэшируется, здесь достаточно сбросить кэш фона
+        self.resetCachedContent()
+        self.viewport().update()
+
+    def drawBackground(self, painter, rect):
+        super().drawBackground(painter, rect)
+        paint_table(painter, self.table)
+
+    def drawForeground(self, painter, rect):
+        super().drawForeground(painter, rect)
+        if not self.profiler_hud_lines:
+            return
+        # Панель профилировщика рисуется в координатах окна, без масштаба стола
+        painter.save()
+        painter.resetTransform()
+        painter.fillRect(self.profiler_hud_rect, QColor(0, 0, 0, 180))
+        painter.setPen(QColor(230, 230, 230))
+        painter.setFont(self.profiler_hud_font)
+        painter.drawText(self.profiler_hud_rect.adjusted(6, 4, -6, -4),
+                         Qt.AlignmentFlag.AlignLeft, "\n".join(self.profiler_hud_lines))
+        painter.restore()
+
+    def paintEvent(self, event):
+        if not self.profiler.enabled:
+            super().paintEvent(event)
+            return
+        start = time.perf_counter()
+        super().paintEvent(event)
+        self.profiler.add_time("paint", time.perf_counter() - start)
             
+    def create_aim_items(self):
+        # Кий и подсказка - постоянные элементы сцены: при прицеливании меняются
+        # только их форма и положение, а не создаются новые на каждое событие мыши
+        self.cue_line = QGraphicsPathItem()
+        # Градиент задан в долях рамки кия, поэтому не зависит от его длины
+        gradient = QLinearGradient(0, 0, 1, 0)
+        gradient.setCoordinateMode(QGradient.CoordinateMode.ObjectMode)
+        gradient.setColorAt(0, QColor(139, 69, 19))  # Темный конец (бьющий)
+        gradient.setColorAt(1, QColor(210, 180, 140))  # Светлый конец
+        self.cue_line.setBrush(QBrush(gradient))
+        self.cue_line.setPen(QPen(Qt.PenStyle.NoPen))
+        self.cue_line.setZValue(2)
+        self.cue_line.hide()
+        self.scene.addItem(self.cue_line)
+
+        def preview_pen(color):
+            pen = QPen(color, 1.5, Qt.PenStyle.DashLine)
+            pen.setCosmetic(True)
+            return pen
+
+        self.preview_cue_path = QGraphicsPathItem()
+        self.preview_cue_path.setPen(preview_pen(QColor(255, 255, 255, 170)))
+        self.preview_target_path = QGraphicsPathItem()
+        self.preview_target_path.setPen(preview_pen(QColor(255, 220, 80, 200)))
+        radius = self.cue_ball.radius if self.cue_ball else 15
+        self.preview_ghost = QGraphicsEllipseItem(-radius, -radius, radius * 2, radius * 2)
+        self.preview_ghost.setPen(preview_pen(QColor(255, 255, 255, 170)))
+        self.preview_items = (self.preview_cue_path, self.preview_target_path, self.preview_ghost)
+        for item in self.preview_items:
+            item.setZValue(1)
+            item.hide()
+            self.scene.addItem(item)
+
     def mouseMoveEvent(self, event):
         if self.drag_start and self.cue_ball and not self.cue_ball.in_pocket:
-            end_pos = self.mapToScene(event.pos())
-            
-            if self.cue_line:
-                self.scene.removeItem(self.cue_line)
-            
-            # Рассчитываем расстояние от битка до курсора
-            dx = end_pos.x() - self.cue_ball.position[0]
-            dy = end_pos.y() - self.cue_ball.position[1]
-            drag_distance = math.hypot(dx, dy)
-            angle = math.atan2(dy, dx)
-            
-            # Параметры кия (динамические)
-            min_cue_length = 0  # Минимальная длина кия
-            max_cue_length = 400  # Максимальная длина кия
-            cue_length = min(max(drag_distance, min_cue_length), max_cue_length)
-            
-            # Ширина изменяется вместе с длиной
-            tip_width = 6  # Ширина толстого конца (у битка)
-            base_width = max(2, 6 - (cue_length / max_cue_length) * 4)  # Ширина тонкого конца
-            
-            # Начальная точка - от битка в направлении курсора
-            start_x = self.cue_ball.position[0] + math.cos(angle) * (self.cue_ball.radius + 5)
-            start_y = self.cue_ball.position[1] + math.sin(angle) * (self.cue_ball.radius + 5)
-            
-            # Конечная точка - от битка наружу
-            end_x = start_x + math.cos(angle) * cue_length
-            end_y = start_y + math.sin(angle) * cue_length
-            
-            # Градиент для кия
-            gradient = QLinearGradient(start_x, start_y, end_x, end_y)
-            gradient.setColorAt(0, QColor(139, 69, 19))  # Темный конец (бьющий)
-            gradient.setColorAt(1, QColor(210, 180, 140))  # Светлый конец
-            
-            # Создаем кий как полигон
-            path = QPainterPath()
-            perpendicular = angle + math.pi/2
-            
-            # Рассчитываем точки для переменной ширины
-            tip_offset_x = math.cos(perpendicular) * tip_width/2
-            tip_offset_y = math.sin(perpendicular) * tip_width/2
-            base_offset_x = math.cos(perpendicular) * base_width/2
-            base_offset_y = math.sin(perpendicular) * base_width/2
-            
-            # Рисуем трапецию
-            path.moveTo(end_x - tip_offset_x, end_y - tip_offset_y)
-            path.lineTo(end_x + tip_offset_x, end_y + tip_offset_y)
-            path.lineTo(start_x + base_offset_x, start_y + base_offset_y)
-            path.lineTo(start_x - base_offset_x, start_y - base_offset_y)
-            path.closeSubpath()
-            
-            self.cue_line = QGraphicsPathItem(path)
-            self.cue_line.setBrush(QBrush(gradient))
-            self.cue_line.setPen(QPen(Qt.GlobalColor.transparent))
-            self.scene.addItem(self.cue_line)
-            
+            # Мышь с высокой частотой опроса шлёт событий больше, чем кадров:
+            # запоминаем только последнюю точку
+            self.aim_pos = self.mapToScene(event.pos())
+            if not self.aim_timer.isActive():
+                self.aim_timer.start()
+
+    def update_aim(self):
+        if not self.drag_start or self.aim_pos is None or not self.cue_ball \
+                or self.cue_ball.in_pocket:
+            return
+        end_pos = self.aim_pos
+
+        # Рассчитываем расстояние от битка до курсора
+        dx = end_pos.x() - self.cue_ball.position[0]
+        dy = end_pos.y() - self.cue_ball.position[1]
+        drag_distance = math.hypot(dx, dy)
+        angle = math.atan2(dy, dx)
+
+        # Параметры кия (динамические)
+        min_cue_length = 0  # Минимальная длина кия
+        max_cue_length = 400  # Максимальная длина кия
+        cue_length = min(max(drag_distance, min_cue_length), max_cue_length)
+
+        # Ширина изменяется вместе с длиной
+        tip_width = 6  # Ширина толстого конца (у битка)
+        base_width = max(2, 6 - (cue_length / max_cue_length) * 4)  # Ширина тонкого конца
+
+        # Кий строится вдоль оси x элемента от точки у битка, а на место
+        # его ставят положение и поворот элемента
+        path = QPainterPath()
+        path.moveTo(cue_length, -tip_width / 2)
+        path.lineTo(cue_length, tip_width / 2)
+        path.lineTo(0, base_width / 2)
+        path.lineTo(0, -base_width / 2)
+        path.closeSubpath()
+
+        self.cue_line.setPath(path)
+        self.cue_line.setPos(self.cue_ball.position[0] + math.cos(angle) * (self.cue_ball.radius + 5),
+                             self.cue_ball.position[1] + math.sin(angle) * (self.cue_ball.radius + 5))
+        self.cue_line.setRotation(math.degrees(angle))
+        self.cue_line.show()
+
+        # Удар - от курсора к битку, сила как в mouseReleaseEvent
+        force = self.shot_force(drag_distance)
+        if force:
+            self.request_preview(angle + math.pi, force)
+        else:
+            self.cancel_preview()
+
+    def shot_force(self, drag_distance):
+        # Параметры силы удара; слишком короткая оттяжка - не удар (0)
+        min_force = 10
+        max_force = 2000
+        force_multiplier = 6
+        force = min(max(drag_distance * force_multiplier, min_force), max_force)
+        return force if force > min_force else 0.0
+
     def mouseReleaseEvent(self, event):
-        if event.button() == Qt.MouseButton.LeftButton and self.cue_line:
+        if event.button() == Qt.MouseButton.LeftButton and self.cue_line.isVisible():
             if self.cue_ball and not self.cue_ball.in_pocket:
                 end_pos = self.mapToScene(event.pos())
                 
                 # Рассчитываем расстояние для силы удара
                 dx = self.cue_ball.position[0] - end_pos.x()
                 dy = self.cue_ball.position[1] - end_pos.y()
-                drag_distance = math.hypot(dx, dy)
+                force = self.shot_force(math.hypot(dx, dy))
                 
-                # Параметры силы удара
-                min_force = 10
-                max_force = 2000
-                force_multiplier = 6
-                force = min(max(drag_distance * force_multiplier, min_force), max_force)
-                
-                if force > min_force:
-                    angle = math.atan2(dy, dx)
-                    self.cue_ball.body.velocity = (force * math.cos(angle), 
-                                                force * math.sin(angle))
-                    
-                    # Проверяем, был ли забит шар в предыдущем ходе
-                    if not any(ball.in_pocket for ball in self.balls if ball.number != 0):
-                        # Если не было забито шаров, меняем игрока
-                        self.current_player = 3 - self.current_player
-                        self.game_rules.current_player = self.current_player
+                if force:
+                    self.strike_cue_ball(math.atan2(dy, dx), force)
             
-            # Удаляем кий после удара
-            self.scene.removeItem(self.cue_line)
-            self.cue_line = None
-            self.drag_start = None
+            # Прячем кий после удара
+            self.hide_aim()
+
+    def hide_aim(self):
+        self.aim_timer.stop()
+        self.cancel_preview()
+        self.cue_line.hide()
+        self.drag_start = None
+        self.aim_pos = None
+        self.aim_state = None
+
+    def set_preview_enabled(self, enabled):
+        if enabled:
+            self.preview_predictor = ShotPredictor(self.table, self.physics_hz)
+            self.preview_executor = ThreadPoolExecutor(max_workers=1)
+        else:
+            self.cancel_preview()
+            if self.preview_executor is not None:
+                self.preview_executor.shutdown(wait=False, cancel_futures=True)
+            self.preview_predictor = None
+            self.preview_executor = None
+
+    def cancel_preview(self):
+        # Устаревший расчёт прерывается на ближайшем шаге физики, а его
+        # результат, если уже в пути, отбрасывается по поколению
+        if self.preview_cancel is not None:
+            self.preview_cancel.set()
+            self.preview_cancel = None
+        if self.preview_future is not None:
+            self.preview_future.cancel()
+            self.preview_future = None
+        self.preview_generation += 1
+        for item in self.preview_items:
+            item.hide()
+
+    def request_preview(self, angle, force):
+        if self.preview_executor is None:
+            return
+        if self.preview_cancel is not None:
+            self.preview_cancel.set()
+        if self.preview_future is not None:
+            self.preview_future.cancel()
+        if self.aim_state is None:
+            # Пока целимся, шары стоят: снимка стола хватает на весь прицел
+            self.aim_state = balls_to_state(self.balls)
+        self.preview_generation += 1
+        self.preview_cancel = threading.Event()
+        self.preview_future = self.preview_executor.submit(
+            self.run_preview, self.preview_predictor, self.preview_generation,
+            self.aim_state, angle, force, self.preview_cancel)
+
+    def run_preview(self, predictor, generation, state, angle, force, cancel):
+        # Фоновый поток: сцену не трогаем, результат уходит сигналом.
+        # Предсказатель передаётся при постановке задачи: после выключения
+        # подсказки поле уже None, а после повторного включения - другой
+        preview = predictor.predict(state, angle, force, cancel)
+        if preview is not None:
+            self.preview_signal.emit(generation, preview)
+
+    def show_preview(self, generation, preview):
+        if generation != self.preview_generation or not self.cue_line.isVisible():
+            return
+        self.preview_cue_path.setPath(polyline_path(preview.cue_path))
+        self.preview_cue_path.setVisible(len(preview.cue_path) > 1)
+        self.preview_target_path.setPath(polyline_path(preview.target_path))
+        self.preview_target_path.setVisible(len(preview.target_path) > 1)
+        if preview.contact is not None:
+            self.preview_ghost.setPos(*preview.contact)
+        self.preview_ghost.setVisible(preview.contact is not None)
+
+    def start_shot_log(self):
+        self.shot_log = ShotLog.from_balls(self.table, self.balls, self.physics_hz,
+                                           self.cue_ball_out_pos, self.physics.spatial_hash)
+        self.game_started = time.perf_counter()
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.game_started) * 1000
+
+    def save_shot_log(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Сохранить запись партии", "",
+                                              "Запись партии (*.shots)")
+        if path:
+            self.shot_log.save(path)
+
+    def set_profiler_enabled(self, enabled):
+        self.profiler.set_enabled(enabled)
+        if enabled:
+            self.profiler.clear()
+            self.profiler_hud_time = 0.0
+            self.refresh_profiler_hud()
+        else:
+            self.viewport().update(self.profiler_hud_rect)
+            self.profiler_hud_lines = []
+
+    def save_frame_profile(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Сохранить профиль кадров", "",
+                                              "Профиль кадров (*.csv)")
+        if path:
+            self.profiler.dump(path)
+
+    def refresh_profiler_hud(self):
+        # Текст панели пересчитывается не чаще четырёх раз в секунду
+        now = time.perf_counter()
+        if now - self.profiler_hud_time < 0.25:
+            return
+        self.profiler_hud_time = now
+        stats = self.profiler.percentiles((50, 99))
+        lines = [f"{'':<18}{'p50':>8}{'p99':>8}"]
+        for name in COLUMNS:
+            p50, p99 = stats.get(name, (0.0, 0.0))
+            if name == "frame" or name in PHASES:
+                lines.append(f"{name + ', мс':<18}{p50 * 1000:>8.2f}{p99 * 1000:>8.2f}")
+            else:
+                lines.append(f"{name:<18}{p50:>8.1f}{p99:>8.1f}")
+        lines.append(f"кадров: {self.profiler.count}")
+
+        metrics = QFontMetrics(self.profiler_hud_font)
+        width = max(metrics.horizontalAdvance(line) for line in lines)
+        self.viewport().update(self.profiler_hud_rect)
+        self.profiler_hud_lines = lines
+        self.profiler_hud_rect = QRect(8, 8, width + 12, metrics.lineSpacing() * len(lines) + 8)
+        self.viewport().update(self.profiler_hud_rect)
+
+    def count_contacts(self):
+        # Контакт двух шаров виден из обоих тел, поэтому идёт за половину
+        contacts = [0.0]
+
+        def count(arbiter):
+            contacts[0] += 0.5 if arbiter.shapes[1].collision_type == 1 else 1
 
-    def handle_ball_pocket_collision(self, arbiter, space, data):
-        ball_shape = arbiter.shapes[0]
         for ball in self.balls:
-            if hasattr(ball, 'body') and ball.body and ball.body == ball_shape.body:
-                ball.in_pocket = True
-                
-                if ball.number == 0:  # Биток
-                    # Переносим биток в специальную позицию
-                    ball.body.position = self.cue_ball_out_pos
-                    ball.body.velocity = (0, 0)
-                    ball.in_pocket = False
-                    self.dragging_cue_ball = True
-                    # Штраф за биток - передача хода
-                    self.current_player = 3 - self.current_player
-                    return False
-                
-                elif ball.number == 8:  # Черный шар
-                    if ball.body and ball.body.shapes:
-                        shape = next(iter(ball.body.shapes))
-                        space.remove(ball.body, shape)
-                    # Проверяем условия победы
-                    player_balls = []
-                    opponent_balls = []
-                    
-                    if self.game_rules.player1_type == "solid":
-                        player_balls = [b for b in self.initial_balls if 1 <= b.number <= 7]
-                        opponent_balls = [b for b in self.initial_balls if 9 <= b.number <= 15]
-                    else:
-                        player_balls = [b for b in self.initial_balls if 9 <= b.number <= 15]
-                        opponent_balls = [b for b in self.initial_balls if 1 <= b.number <= 7]
-                    
-                    # Все шары игрока должны быть забиты до черного
-                    player_balls_potted = all(b.in_pocket for b in player_balls)
-                    opponent_balls_potted = any(b.in_pocket for b in opponent_balls)
-                    
-                    if (self.current_player == 1 and self.game_rules.player1_type == "solid" and player_balls_potted) or \
-                    (self.current_player == 2 and self.game_rules.player2_type == "solid" and player_balls_potted):
-                        self.game_over_signal.emit(self.current_player)  # Победа
-                    else:
-                        self.game_over_signal.emit(3 - self.current_player)  # Поражение
-                    return False
-                
-                else:
-                    self.potted_balls_order.append(ball.number)
-                    # Используем game_rules для обработки забитых шаров
-                    self.game_rules.check_pocketed_balls([ball], self.table)
-                    
-                    # Обновляем текущего игрока из game_rules
-                    self.current_player = self.game_rules.current_player
-                    
-                    # Обновляем счет
-                    self.player2_score = self.game_rules.player1_score
-                    self.player1_score = self.game_rules.player2_score
+            if ball.body is not None and not ball.body.is_sleeping:
+                ball.body.each_arbiter(count)
+        return contacts[0]
+
+    def strike_cue_ball(self, angle, force):
+        # Бьём квантованными значениями из записи, чтобы повтор совпал с партией
+        self.undo_stack.append(self.snapshot_state())
+        shot = self.shot_log.record(self.cue_ball.body.position, angle, force, self.elapsed_ms())
+        self.cue_ball.body.position = shot.cue_position
+        self.cue_ball.body.velocity = (shot.force * math.cos(shot.angle), 
+                                    shot.force * math.sin(shot.angle))
+        self.resting = False
+        self.cancel_win_estimate()
+        self.activity_signal.emit()
+        
+        # Проверяем, был ли забит шар в предыдущем ходе
+        if not any(ball.in_pocket for ball in self.balls if ball.number != 0):
+            # Если не было забито шаров, меняем игрока
+            self.current_player = 3 - self.current_player
+            self.game_rules.current_player = self.current_player
+
+    def set_ai_enabled(self, enabled):
+        if enabled:
+            self.ai_player = AIPlayer(self.table)
+            self.ai_executor = ThreadPoolExecutor(max_workers=1)
+            self.activity_signal.emit()
+        else:
+            if self.ai_executor is not None:
+                self.ai_executor.shutdown(wait=False, cancel_futures=True)
+            self.ai_player = None
+            self.ai_executor = None
+            self.ai_future = None
+
+    def set_win_probability_enabled(self, enabled):
+        if enabled:
+            # numpy нужен только оценке шансов - не тянем его при запуске игры
+            from core.win_probability import WinProbabilityEstimator
+            self.win_estimator = WinProbabilityEstimator(self.table,
+                                                         cue_out_position=self.cue_ball_out_pos)
+            self.win_executor = ThreadPoolExecutor(max_workers=1)
+            # Иначе при выходе пришлось бы ждать, пока поток доиграет продолжения
+            QApplication.instance().aboutToQuit.connect(self.cancel_win_estimate)
+            self.win_pending = True
+            self.activity_signal.emit()
+        else:
+            self.cancel_win_estimate()
+            if self.win_executor is not None:
+                self.win_executor.shutdown(wait=False, cancel_futures=True)
+            QApplication.instance().aboutToQuit.disconnect(self.cancel_win_estimate)
+            self.win_estimator = None
+            self.win_executor = None
+            self.win_pending = False
+
+    def cancel_win_estimate(self):
+        if self.win_cancel is not None:
+            self.win_cancel.set()
+            self.win_cancel = None
+        self.win_generation += 1
+        self.win_estimate_signal.emit(self.win_generation, None)
+
+    def update_win_estimate(self):
+        # Оценка запускается, когда стол замер после удара, отмены или сброса
+        if not self.win_pending or not self.resting or self.win_estimator is None:
+            return
+        self.win_pending = False
+        if not self.cue_ball or self.cue_ball.in_pocket or \
+                not any(ball.number == 8 for ball in self.balls):
+            return
+        self.cancel_win_estimate()
+        self.win_cancel = threading.Event()
+        self.win_executor.submit(
+            self.run_win_estimate, self.win_generation, balls_to_state(self.balls),
+            self.game_rules.player1_type, self.game_rules.player2_type,
+            self.current_player, self.win_cancel)
+
+    def run_win_estimate(self, generation, state, player1_type, player2_type,
+                         current_player, cancel):
+        # Фоновый поток: сцену не трогаем, оценки уходят сигналом в поток интерфейса
+        for estimate in self.win_estimator.estimate(state, player1_type, player2_type,
+                                                    current_player, cancel):
+            self.win_estimate_signal.emit(generation, estimate)
+
+    def is_ai_turn(self):
+        return self.ai_player is not None and self.current_player == self.ai_player_number
+
+    def update_ai_turn(self):
+        # Решение считается в отдельном потоке на своём пространстве pymunk,
+        # а здесь только запускается и забирается готовый удар
+        if not self.is_ai_turn():
+            return
+        if self.ai_future is None:
+            if not self.cue_ball or self.cue_ball.in_pocket:
+                return
+            if not self.resting:
+                return
+            self.ai_future = self.ai_executor.submit(
+                self.ai_player.choose_shot, balls_to_state(self.balls),
+                copy.copy(self.game_rules), self.current_player)
+        elif self.ai_future.done():
+            angle, force = self.ai_future.result()
+            self.ai_future = None
+            self.strike_cue_ball(angle, force)
+
+    def handle_ball_pocket_collision(self, arbiter, space, data):
+        self.collision_callbacks += 1
+        # Шар находится через реестр движка, без перебора всех шаров
+        ball = self.physics.ball_for_shape(arbiter.shapes[0])
+        if ball is None or ball.in_pocket:
+            return True
+        ball.in_pocket = True
+        if ball.number != 0:
+            self.potted_pending.append(ball)
+        
+        if ball.number == 0:  # Биток
+            # Переносим биток в специальную позицию
+            ball.body.position = self.cue_ball_out_pos
+            ball.previous_position = self.cue_ball_out_pos
+            ball.body.velocity = (0, 0)
+            ball.in_pocket = False
+            self.dragging_cue_ball = True
+            # Штраф за биток - передача хода
+            self.current_player = 3 - self.current_player
+            return False
+        
+        elif ball.number == 8:  # Черный шар
+            self.physics.remove_ball(ball)
+            # Проверяем условия победы
+            player_balls = []
+            opponent_balls = []
+            
+            if self.game_rules.player1_type == "solid":
+                player_balls = [b for b in self.initial_balls if 1 <= b.number <= 7]
+                opponent_balls = [b for b in self.initial_balls if 9 <= b.number <= 15]
+            else:
+                player_balls = [b for b in self.initial_balls if 9 <= b.number <= 15]
+                opponent_balls = [b for b in self.initial_balls if 1 <= b.number <= 7]
+            
+            # Все шары игрока должны быть забиты до черного
+            player_balls_potted = all(b.in_pocket for b in player_balls)
+            opponent_balls_potted = any(b.in_pocket for b in opponent_balls)
+            
+            if (self.current_player == 1 and self.game_rules.player1_type == "solid" and player_balls_potted) or \
+            (self.current_player == 2 and self.game_rules.player2_type == "solid" and player_balls_potted):
+                self.game_over_signal.emit(self.current_player)  # Победа
+            else:
+                self.game_over_signal.emit(3 - self.current_player)  # Поражение
+            return False
+        
+        else:
+            # Убираем из физики сразу, а не в конце кадра: иначе забитый шар
+            # успевал бы столкнуться с другими в зависимости от частоты кадров
+            self.physics.remove_ball(ball)
+            self.potted_balls_order.append(ball.number)
+            # Используем game_rules для обработки забитых шаров
+            self.game_rules.check_pocketed_balls([ball], self.table)
+            
+            # Обновляем текущего игрока из game_rules
+            self.current_player = self.game_rules.current_player
+            
+            # Обновляем счет
+            self.player2_score = self.game_rules.player1_score
+            self.player1_score = self.game_rules.player2_score
         return True
 
     def mousePressEvent(self, event):
         if event.button() == Qt.MouseButton.LeftButton:
             # Проверяем, что все шары остановились
-            all_stopped = all(not ball.is_moving() for ball in self.balls if not ball.in_pocket)
-            
-            if not all_stopped:
+            if not self.resting or self.is_ai_turn():
                 return
                 
             if self.cue_ball and not self.cue_ball.in_pocket:
                 self.drag_start = self.mapToScene(event.pos())
+                self.activity_signal.emit()
+
+    def sprite_scale(self):
+        # Масштаб вида в пикселях устройства: спрайт растеризуется под него
+        return self.transform().m11() * self.devicePixelRatioF()
+
+    def create_ball_item(self, ball):
+        # Элемент создаётся один раз на шар, дальше только перемещается через setPos.
+        # До первого resizeEvent масштаб вида ещё не известен: спрайт
+        # растеризуется в adjust_table_size, а не дважды при запуске
+        ball_item = QGraphicsPixmapItem()
+        if self.sprite_cache_scale is not None:
+            ball_item.setPixmap(self.sprite_cache.get(ball.number, ball.color, ball.radius,
+                                                      self.sprite_cache_scale))
+        ball_item.setOffset(-ball.radius - 1, -ball.radius - 1)
+        ball_item.last_pos = None
+        self.scene.addItem(ball_item)
+        self.ball_items[ball] = ball_item
+        return ball_item
+
+    def refresh_ball_sprites(self):
+        scale = self.sprite_scale()
+        for ball, ball_item in self.ball_items.items():
+            ball_item.setPixmap(self.sprite_cache.get(ball.number, ball.color, ball.radius, scale))
 
     def draw_ball(self, ball):
         if ball.in_pocket or not hasattr(ball, 'position') or not ball.position:
             return
-            
-        ball_item = QGraphicsEllipseItem(
-            ball.position[0] - ball.radius,
-            ball.position[1] - ball.radius,
-            ball.radius * 2,
-            ball.radius * 2
-        )
-        ball_item.setPen(QPen(Qt.GlobalColor.black, 1))
-        ball_item.setBrush(QBrush(QColor(*ball.color)))
-        self.scene.addItem(ball_item)
-        
-        if 9 <= ball.number <= 15:
-            # Создаем полосу с закругленными краями
-            path = QPainterPath()
-            stripe_width = ball.radius * 1.9
-            stripe_height = ball.radius * 0.6
-            path.addRoundedRect(
-                ball.position[0] - stripe_width/2,
-                ball.position[1] - stripe_height/2,
-                stripe_width,
-                stripe_height,
-                stripe_height/2,
-                stripe_height/2
-            )
-            stripe = QGraphicsPathItem(path, ball_item)
-            stripe.setPen(QPen(Qt.PenStyle.NoPen))
-            stripe.setBrush(QBrush(Qt.GlobalColor.white))
-        
-        if ball.number > 0:
-            text = QGraphicsSimpleTextItem(str(ball.number), ball_item)
-            text.setFont(QFont("Arial", 10))
-            text_color = Qt.GlobalColor.white if ball.number == 8 else Qt.GlobalColor.black
-            text.setBrush(QBrush(text_color))
-            text.setPos(
-                ball.position[0] - text.boundingRect().width()/2,
-                ball.position[1] - text.boundingRect().height()/2
-            )
+        ball_item = self.ball_items.get(ball)
+        if ball_item is None:
+            ball_item = self.create_ball_item(ball)
+
+        pos = ball.interpolated_position(self.render_alpha)
+        if pos != ball_item.last_pos:
+            ball_item.setPos(pos[0], pos[1])
+            ball_item.last_pos = pos
 
     def update_balls(self):
-        # Проверяем, все ли шары остановились
-        all_stopped = True
-        
-        for ball in self.balls:
-            if hasattr(ball, 'body') and ball.body:
-                ball.update_position()
-                if ball.is_moving() and not ball.in_pocket:
-                    all_stopped = False
-        
-        # Удаляем забитые шары
-        balls_to_remove = [b for b in self.balls if getattr(b, 'in_pocket', False)]
-        for ball in balls_to_remove:
-            if ball.body and ball.body.shapes:
-                shape = next(iter(ball.body.shapes))
-                self.physics.space.remove(ball.body, shape)
+        # Удаляем забитые шары из физики, а их графику только прячем
+        game_over = False
+        for ball in self.potted_pending:
+            self.physics.remove_ball(ball)
             if ball in self.balls:
                 self.balls.remove(ball)
-        
-        # Очищаем сцену от старых шаров
-        for item in self.scene.items():
-            if isinstance(item, (QGraphicsEllipseItem, QGraphicsSimpleTextItem)):
-                if not hasattr(item, 'is_table_item'):
-                    self.scene.removeItem(item)
-    
-        # Рисуем все шары
-        for ball in self.balls:
+            if ball in self.ball_items:
+                self.ball_items[ball].hide()
+            game_over = game_over or ball.number == 8
+        self.potted_pending = []
+
+        # Спящие тела pymunk не двигаются: позиции читаются и элементы
+        # двигаются только у шаров, не спавших в этом или прошлом кадре
+        # (уснувшие с прошлого кадра дорисовываются в конечной позиции)
+        awake = [ball for ball in self.balls
+                 if ball.body is not None and not ball.body.is_sleeping]
+        fell_asleep = [ball for ball in self.awake_balls
+                       if ball.body is not None and ball.body.is_sleeping and not ball.in_pocket]
+        self.awake_balls = awake
+        for ball in awake + fell_asleep:
+            ball.update_position()
             self.draw_ball(ball)
         
         # Проверяем условия завершения игры
-        if len([b for b in self.balls if b.number == 8]) == 0:  # Черный шар забит
+        if game_over and not any(b.number == 8 for b in self.balls):  # Черный шар забит
             self.game_over_signal.emit(self.current_player)
 
-    def update_display(self):
+    def is_idle(self):
+        # Стол в покое: шары стоят, и компьютер не собирается бить
+        if not self.resting:
+            return False
+        ai_will_shoot = self.is_ai_turn() and self.cue_ball and not self.cue_ball.in_pocket
+        return not ai_will_shoot
+
+    def settle_balls(self):
+        # Гасим остаточные скорости, как ShotSimulator в конце удара,
+        # чтобы следующий удар начинался из того же состояния
+        settle_balls(self.balls)
+        for ball in self.balls:
+            ball.save_previous_position()
+            ball.update_position()
+
+    def step_physics(self, dt, steps=1):
+        # Удар заканчивается на первом шаге, где все шары стоят, - так же,
+        # как в ShotReplayer, и не зависит от того, сколько шагов в кадре
+        profiling = self.profiler.enabled
+        callbacks = self.collision_callbacks
+        steps_done = 0
+        contacts = 0.0
+        # Проверяем только шары, не спавшие на прошлом кадре; всех обходим,
+        # лишь когда среди них движущихся не осталось (шар могло разбудить
+        # столкновение), - покой по-прежнему определяется по всем шарам
+        moving = self.awake_balls
+        for step in range(steps):
+            if self.resting:
+                break
+            # Для интерполяции нужна только позиция перед последним шагом кадра
+            if step == steps - 1:
+                for ball in self.awake_balls:
+                    ball.save_previous_position()
+            self.physics.update(dt)
+            if profiling:
+                steps_done += 1
+                contacts += self.count_contacts()
+            moving = [ball for ball in moving if ball.is_moving() and not ball.in_pocket]
+            if not moving:
+                moving = [ball for ball in self.balls if ball.is_moving() and not ball.in_pocket]
+            if not moving:
+                self.settle_balls()
+                self.resting = True
+                self.win_pending = True
+
+        if profiling:
+            profiler = self.profiler
+            profiler.set_counter("steps", steps_done)
+            profiler.set_counter("contacts_per_step", contacts / steps_done if steps_done else 0.0)
+            profiler.set_counter("callbacks", self.collision_callbacks - callbacks)
+            profiler.set_counter("active_bodies", sum(
+                1 for ball in self.balls if ball.body is not None and not ball.body.is_sleeping))
+
+    def update_display(self, alpha=1.0):
+        self.render_alpha = alpha
         self.update_balls()
+        self.update_ai_turn()
+        self.update_win_estimate()
 
     def handle_ball_collision(self, arbiter, space, data):
+        self.collision_callbacks += 1
         return True
     
     def resizeEvent(self, event):
         """Обработчик изменения размера окна"""
         super().resizeEvent(event)
         self.adjust_table_size()
+        self.activity_signal.emit()
         
     def adjust_table_size(self):
         """Адаптирует размер стола к текущему размеру виджета"""
@@ -444,6 +854,14 @@ class GameCanvas(QGraphicsView):
         # Применяем масштабирование
         self.resetTransform()
         self.scale(scale_factor, scale_factor)
+
+        # Закэшированный фон стола строится заново под новый размер
+        self.resetCachedContent()
+
+        # Спрайты шаров перерисовываются только при смене масштаба
+        if self.sprite_scale() != self.sprite_cache_scale:
+            self.sprite_cache_scale = self.sprite_scale()
+            self.refresh_ball_sprites()
         
         # Центрируем сцену
         self.setAlignment(Qt.AlignmentFlag.AlignCenter)
\ No newline at end of file
@@ -5,24 +5,51 @@ from PyQt6.QtWidgets import (QMainWindow, QVBoxLayout, QWidget, QLabel,
                             QPushButton, QMessageBox, QHBoxLayout, QSizePolicy, QApplication, 
                             QStackedWidget)
 from PyQt6.QtGui import QFont, QColor, QPainter
+from core.sim_clock import SimulationClock
+
+CURRENT_PLAYER_STYLES = {
+    1: """
+        font: bold 18px;
+        color: #4CAF50;
+        qproperty-alignment: AlignCenter;
+    """,
+    2: """
+        font: bold 18px;
+        color: #2196F3;
+        qproperty-alignment: AlignCenter;
+    """,
+}
 
 class MainWindow(QMainWindow):
-    def __init__(self, game_canvas):
+    def __init__(self, game_canvas, physics_hz=240, display_hz=60):
         super().__init__()
         self.setWindowTitle("2D Бильярд")
         self.setMinimumSize(900, 600)
         
         self.game_canvas = game_canvas
+        # Физика идёт фиксированным шагом независимо от частоты таймера
+        self.clock = SimulationClock(physics_hz)
         self.timer = QTimer()
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
         self.timer.timeout.connect(self.update_game)
-        self.timer.start(16)  # ~60 FPS
+        self.timer.setInterval(round(1000 / display_hz))
+        self.timer.start()
         
         # Словари для хранения виджетов шаров
         self.player1_balls = {}
         self.player2_balls = {}
+        # Заранее созданные значки забитых шаров, переиспользуются всю игру
+        self.potted_icons = {}
+
+        # То, что сейчас показано на панели: обновляем её только при изменениях
+        self.shown_potted = []
+        self.shown_player1_score = 0
+        self.shown_player2_score = 0
+        self.shown_current_player = 1
         
         self.create_score_widget()
         self.init_score_balls()
+        self.set_current_player_indicator(1)
         
         # Основной layout
         central_widget = QWidget()
@@ -34,6 +61,9 @@ class MainWindow(QMainWindow):
         
         # Связываем сигнал завершения игры с обработчиком
         self.game_canvas.game_over_signal.connect(self.handle_game_over)
+        # Таймер спит, пока стол в покое, и просыпается по действию игрока
+        self.game_canvas.activity_signal.connect(self.wake_up)
+        self.game_canvas.win_estimate_signal.connect(self.show_win_estimate)
 
     def create_score_widget(self):
         self.score_widget = QWidget()
@@ -78,6 +108,21 @@ class MainWindow(QMainWindow):
             qproperty-alignment: AlignCenter;
             min-width: 150px;
         """)
+        # Шансы на победу под индикатором, пока включена их оценка
+        self.win_probability_label = QLabel()
+        self.win_probability_label.setStyleSheet("""
+            font: 13px;
+            color: #cccccc;
+            qproperty-alignment: AlignCenter;
+        """)
+        self.win_probability_label.hide()
+        self.center_container = QWidget()
+        center_layout = QVBoxLayout()
+        center_layout.setSpacing(0)
+        center_layout.setContentsMargins(0, 0, 0, 0)
+        center_layout.addWidget(self.current_player_indicator)
+        center_layout.addWidget(self.win_probability_label)
+        self.center_container.setLayout(center_layout)
         
         # Контейнер игрока 2 (полосатые шары)
         self.player2_container = QWidget()
@@ -103,7 +148,7 @@ class MainWindow(QMainWindow):
         
         # Собираем все вместе
         self.score_layout.addWidget(self.player1_container)
-        self.score_layout.addWidget(self.current_player_indicator)
+        self.score_layout.addWidget(self.center_container)
         self.score_layout.addWidget(self.player2_container)
         self.score_widget.setLayout(self.score_layout)
 
@@ -156,58 +201,111 @@ class MainWindow(QMainWindow):
             self.player2_balls[ball_number] = container
 
     def init_score_balls(self):
-        # Инициализация уже выполнена в create_score_widget()
-        pass
+        # Значки для контейнеров забитых шаров создаются один раз
+        for ball_number, ball in list(self.player1_balls.items()) + list(self.player2_balls.items()):
+            icon = self.create_ball_copy(ball)
+            icon.hide()
+            self.potted_icons[ball_number] = icon
 
     def update_game(self):
-        self.game_canvas.physics.update(1/60.0)
-        self.game_canvas.update_display()
+        # Когда профилировщик выключен, замеры стоят одной проверки флага на фазу
+        profiler = self.game_canvas.profiler
+        profiling = profiler.enabled
+        if profiling:
+            profiler.begin_frame()
+        self.game_canvas.step_physics(self.clock.step, self.clock.advance())
+        if profiling:
+            profiler.mark("physics")
+        self.game_canvas.update_display(self.clock.alpha)
+        if profiling:
+            profiler.mark("scene")
         
         # Обновляем счет (теперь player2 слева, player1 справа)
-        self.player1_label.setText(str(self.game_canvas.player1_score))
-        self.player2_label.setText(str(self.game_canvas.player2_score))
+        if self.game_canvas.player1_score != self.shown_player1_score:
+            self.shown_player1_score = self.game_canvas.player1_score
+            self.player1_label.setText(str(self.shown_player1_score))
+        if self.game_canvas.player2_score != self.shown_player2_score:
+            self.shown_player2_score = self.game_canvas.player2_score
+            self.player2_label.setText(str(self.shown_player2_score))
         
         # Обновляем отображение шаров
         self.update_score_balls()
         
         # Обновляем индикатор текущего игрока
-        if self.game_canvas.current_player == 1:
-            self.current_player_indicator.setText("▶ ИГРОК 1 ◀")
-            self.current_player_indicator.setStyleSheet("""
-                font: bold 18px;
-                color: #4CAF50;
-                qproperty-alignment: AlignCenter;
-            """)
+        if self.game_canvas.current_player != self.shown_current_player:
+            self.set_current_player_indicator(self.game_canvas.current_player)
+        if profiling:
+            profiler.mark("panel")
+            self.game_canvas.refresh_profiler_hud()
+
+        # Все шары остановились - не тратим процессор до следующего действия
+        if self.game_canvas.is_idle():
+            self.timer.stop()
+
+    def wake_up(self):
+        if not self.timer.isActive():
+            # Время простоя не должно превратиться в пачку догоняющих шагов
+            self.clock.reset()
+            self.timer.start()
+
+    def set_current_player_indicator(self, player):
+        self.shown_current_player = player
+        self.current_player_indicator.setText(f"▶ ИГРОК {player} ◀")
+        self.current_player_indicator.setStyleSheet(CURRENT_PLAYER_STYLES[player])
+            
+    def show_win_estimate(self, generation, estimate):
+        # Оценка могла прийти уже после следующего удара - такие отбрасываем
+        if generation != self.game_canvas.win_generation:
+            return
+        if estimate is None:
+            self.win_probability_label.hide()
+            return
+        # Пока партии доигрываются, разброс недоигранных занижен - его не показываем
+        if estimate.finished:
+            text = f"Игрок 1: {estimate.player1:.0%} ± {2 * estimate.stderr:.0%}"
         else:
-            self.current_player_indicator.setText("▶ ИГРОК 2 ◀")
-            self.current_player_indicator.setStyleSheet("""
-                font: bold 18px;
-                color: #2196F3;
-                qproperty-alignment: AlignCenter;
-            """)
+            text = f"Игрок 1: {estimate.player1:.0%} ({estimate.rollouts} партий...)"
+        self.win_probability_label.setText(text)
+        self.win_probability_label.show()
             
     def update_score_balls(self):
-        # Очищаем контейнеры забитых шаров
-        for i in reversed(range(self.player1_potted_layout.count())):
-            self.player1_potted_layout.itemAt(i).widget().setParent(None)
-        for i in reversed(range(self.player2_potted_layout.count())):
-            self.player2_potted_layout.itemAt(i).widget().setParent(None)
-        
-        # Добавляем забитые шары в порядке их попадания
-        for ball_number in self.game_canvas.potted_balls_order:
+        potted = self.game_canvas.potted_balls_order
+        if potted == self.shown_potted:
+            return
+        
+        # Порядок забитых шаров только растёт; если он изменился иначе
+        # (новая партия), раскладываем значки заново
+        if potted[:len(self.shown_potted)] != self.shown_potted:
+            self.clear_potted_balls()
+        
+        # Добавляем новые забитые шары в порядке их попадания
+        for ball_number in potted[len(self.shown_potted):]:
+            icon = self.potted_icons.get(ball_number)
             if 1 <= ball_number <= 7:  # Шары игрока 1
-                ball = self.player1_balls.get(ball_number)
-                if ball:
-                    ball_copy = self.create_ball_copy(ball)
-                    self.player1_potted_layout.addWidget(ball_copy)
+                layout, remaining = self.player1_potted_layout, self.player1_balls
             elif 9 <= ball_number <= 15:  # Шары игрока 2
-                ball = self.player2_balls.get(ball_number)
-                if ball:
-                    ball_copy = self.create_ball_copy(ball)
-                    self.player2_potted_layout.addWidget(ball_copy)
-        
-        # Обновляем стили оставшихся шаров
-        self.update_remaining_balls()
+                layout, remaining = self.player2_potted_layout, self.player2_balls
+            else:
+                continue
+            if icon:
+                layout.addWidget(icon)
+                icon.show()
+            if ball_number in remaining:
+                remaining[ball_number].hide()
+        
+        self.shown_potted = list(potted)
+
+    def clear_potted_balls(self):
+        for layout in (self.player1_potted_layout, self.player2_potted_layout):
+            for i in reversed(range(layout.count())):
+                icon = layout.itemAt(i).widget()
+                layout.removeWidget(icon)
+                icon.hide()
+        for ball in self.player1_balls.values():
+            ball.show()
+        for ball in self.player2_balls.values():
+            ball.show()
+        self.shown_potted = []
 
     def create_ball_copy(self, original_ball):
         ball_number = original_ball.property("ball_number")
@@ -237,27 +335,6 @@ class MainWindow(QMainWindow):
         
         return container
 
-    def update_remaining_balls(self):
-        # Для игрока 1
-        potted_solids = [num for num in self.game_canvas.potted_balls_order if 1 <= num <= 7]
-        for num in range(1, 8):
-            ball = self.player1_balls.get(num)
-            if ball:
-                if num in potted_solids:
-                    ball.hide()
-                else:
-                    ball.show()
-        
-        # Для игрока 2
-        potted_stripes = [num for num in self.game_canvas.potted_balls_order if 9 <= num <= 15]
-        for num in range(9, 16):
-            ball = self.player2_balls.get(num)
-            if ball:
-                if num in potted_stripes:
-                    ball.hide()
-                else:
-                    ball.show()
-
     def get_ball_color(self, number):
         colors = {
             1: "#FFFF00", 2: "#0000FF", 3: "#FF0000", 4: "#800080",
@@ -312,26 +389,14 @@ class MainWindow(QMainWindow):
         # Полный сброс интерфейса
         self.game_canvas.reset_game()
         
-        # Очистка контейнеров забитых шаров
-        for i in reversed(range(self.player1_potted_layout.count())):
-            self.player1_potted_layout.itemAt(i).widget().setParent(None)
-        for i in reversed(range(self.player2_potted_layout.count())):
-            self.player2_potted_layout.itemAt(i).widget().setParent(None)
+        # Очистка контейнеров забитых шаров и восстановление всех шаров в панели
+        self.clear_potted_balls()
         
         # Сброс счетов
+        self.shown_player1_score = 0
+        self.shown_player2_score = 0
         self.player1_label.setText("0")
         self.player2_label.setText("0")
         
-        # Восстановление всех шаров в панели
-        for ball in self.player1_balls.values():
-            ball.show()
-        for ball in self.player2_balls.values():
-            ball.show()
-        
         # Сброс индикатора игрока
-        self.current_player_indicator.setText("▶ ИГРОК 1 ◀")
-        self.current_player_indicator.setStyleSheet("""
-            font: bold 18px;
-            color: #4CAF50;
-            qproperty-alignment: AlignCenter;
-        """)
\ No newline at end of file
+        self.set_current_player_indicator(1)
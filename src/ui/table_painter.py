@@ -0,0 +1,34 @@
+# src/ui/table_painter.py
+from PyQt6.QtCore import Qt, QRectF
+from PyQt6.QtGui import QBrush, QColor, QPen, QPainter, QRadialGradient
+
+
+def create_table_brush(table) -> QBrush:
+    gradient = QRadialGradient(table.width/2, table.height/2,
+                               max(table.width, table.height)/1.5)
+    gradient.setColorAt(0, QColor(0, 100, 0))
+    gradient.setColorAt(0.5, QColor(0, 80, 0))
+    gradient.setColorAt(1, QColor(0, 60, 0))
+    return QBrush(gradient)
+
+
+def paint_table(painter: QPainter, table):
+    """Статичная часть стола: сукно, борта и лузы в координатах сцены"""
+    # Основное поле
+    painter.setPen(QPen(Qt.PenStyle.NoPen))
+    painter.setBrush(create_table_brush(table))
+    painter.drawRect(QRectF(0, 0, table.width, table.height))
+
+    # Борта
+    painter.setPen(QPen(QColor(70, 50, 20), 2))
+    painter.setBrush(QBrush(QColor(101, 67, 33)))
+    painter.drawRect(QRectF(0, 0, table.width, 20))
+    painter.drawRect(QRectF(0, table.height - 20, table.width, 20))
+    painter.drawRect(QRectF(0, 0, 20, table.height))
+    painter.drawRect(QRectF(table.width - 20, 0, 20, table.height))
+
+    # Лунки
+    painter.setPen(QPen(Qt.PenStyle.NoPen))
+    painter.setBrush(QBrush(QColor(0, 0, 0)))
+    for x, y in table.pockets:
+        painter.drawEllipse(QRectF(x - 20, y - 20, 40, 40))